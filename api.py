@@ -0,0 +1,80 @@
+"""
+Idea Tracker - JSON API
+Query parsing and serialization for /api/ideas and /api/changes, shared by server.py and app.py
+"""
+
+import json
+
+from database import get_ideas_page, iter_ideas, get_changes, decode_cursor, PUBLIC_FIELDS, STATUSES, PAGE_SIZE
+
+API_MAX_LIMIT = 500
+
+def parse_fields(value):
+    """Comma-separated field names, validated against PUBLIC_FIELDS"""
+    if not value:
+        return PUBLIC_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = set(fields) - set(PUBLIC_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+def parse_limit(value):
+    try:
+        limit = int(value or PAGE_SIZE)
+    except ValueError:
+        raise ValueError("limit must be a number") from None
+    if not 1 <= limit <= API_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {API_MAX_LIMIT}")
+    return limit
+
+def parse_ideas_query(args):
+    """Validate /api/ideas parameters from a {name: value} mapping; raises ValueError
+
+    Returns keyword arguments for get_ideas_page/iter_ideas plus the limit.
+    """
+    status = args.get('status') or None
+    if status is not None and status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    category = args.get('category') or None
+    source = args.get('source') or None
+
+    fields = parse_fields(args.get('fields'))
+
+    cursor = args.get('cursor') or None
+    if cursor is not None:
+        decode_cursor(cursor)
+
+    limit = parse_limit(args.get('limit'))
+    return {'status': status, 'category': category, 'source': source, 'fields': fields, 'cursor': cursor, 'limit': limit}
+
+def parse_changes_query(args):
+    """Validate /api/changes parameters (since, limit, fields); raises ValueError"""
+    try:
+        since = int(args.get('since') or 0)
+    except ValueError:
+        raise ValueError("since must be a sequence number") from None
+    if since < 0:
+        raise ValueError("since must not be negative")
+    return {'since': since, 'limit': parse_limit(args.get('limit')), 'fields': parse_fields(args.get('fields'))}
+
+def project(idea, fields):
+    """Only the requested fields, in the requested order"""
+    return {field: idea[field] for field in fields}
+
+def render_ideas_page(status, category, source, fields, cursor, limit):
+    """One page as a JSON document with the cursor of the next page"""
+    ideas, next_cursor = get_ideas_page(status, cursor, limit, category, fields, source)
+    document = {'ideas': [project(idea, fields) for idea in ideas], 'next_cursor': next_cursor}
+    yield json.dumps(document, ensure_ascii=False).encode()
+
+def render_ideas_ndjson(status, category, source, fields, cursor=None, limit=None):
+    """Every matching idea as one JSON object per line, read page by page"""
+    for idea in iter_ideas(status, category, fields, cursor, source=source):
+        yield json.dumps(project(idea, fields), ensure_ascii=False).encode() + b'\n'
+
+def render_changes(since, limit, fields):
+    """Changes after since as a JSON document; may raise ChangesCompacted"""
+    changes, next_since, more = get_changes(since, limit, fields)
+    document = {'changes': changes, 'next_since': next_since, 'more': more}
+    yield json.dumps(document, ensure_ascii=False).encode()
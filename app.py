@@ -4,20 +4,39 @@ Idea Tracker - Web Application
 Simple Flask app to view and manage business ideas
 """
 
-from flask import Flask, render_template_string, request, redirect, url_for
+from flask import Flask, Response, request, redirect, url_for, abort, jsonify
+from markupsafe import Markup, escape
 import sys
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 from database import (
-    init_db, get_all_ideas, get_ideas_by_status, update_idea_status,
-    get_categories, get_stats, add_idea
+    init_db, release_db, get_ideas_page, search_ideas, update_idea_status, update_ideas_status, get_ideas_by_ids,
+    get_categories, get_stats, get_facets, get_data_version, add_idea, ChangesCompacted, SNIPPET_START, SNIPPET_END,
+    SEARCH_WINDOW
 )
+from api import parse_ideas_query, parse_changes_query, render_ideas_page, render_ideas_ndjson, render_changes
+from facets import facet_rows
 
 app = Flask(__name__)
 
-# Simple HTML template
+# The dev server runs every request on a new thread; without this each one
+# would open its own SQLite connection. Streamed responses release theirs
+# once fully sent.
+@app.after_request
+def release_connection_after(response):
+    response.call_on_close(release_db)
+    return response
+
+@app.teardown_request
+def release_connection(error=None):
+    release_db()
+
+# Simple HTML template; the idea cards are rendered from CARD_TEMPLATE
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
 <html lang="de">
@@ -39,6 +58,8 @@ HTML_TEMPLATE = '''
         .filters { margin-bottom: 20px; display: flex; gap: 10px; flex-wrap: wrap; }
         .filter { padding: 8px 16px; background: white; border: 1px solid #ddd; border-radius: 20px; text-decoration: none; color: #333; }
         .filter.active { background: #007bff; color: white; border-color: #007bff; }
+        .filter small { margin-left: 4px; opacity: 0.7; }
+        .filters + .filters { margin-top: -10px; }
         
         .ideas { display: grid; gap: 20px; }
         .idea { background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
@@ -48,6 +69,7 @@ HTML_TEMPLATE = '''
         .idea .meta { display: flex; gap: 15px; font-size: 12px; color: #999; flex-wrap: wrap; }
         .idea .tags { display: flex; gap: 5px; margin-top: 10px; flex-wrap: wrap; }
         .tag { padding: 4px 8px; background: #e3f2fd; border-radius: 4px; font-size: 12px; }
+        .tag.duplicate { background: #ffebee; }
         
         .status-form { margin-top: 15px; display: flex; gap: 10px; }
         .status-btn { padding: 6px 12px; border: none; border-radius: 4px; cursor: pointer; font-size: 12px; }
@@ -58,12 +80,22 @@ HTML_TEMPLATE = '''
         
         .add-form { background: white; padding: 20px; border-radius: 8px; margin-bottom: 30px; }
         .add-form h2 { margin-bottom: 15px; }
+        .add-form .error { color: #c0392b; margin-bottom: 15px; }
         .form-group { margin-bottom: 15px; }
         .form-group label { display: block; margin-bottom: 5px; font-weight: 500; }
         .form-group input, .form-group textarea, .form-group select { width: 100%; padding: 10px; border: 1px solid #ddd; border-radius: 4px; }
         .form-group textarea { min-height: 80px; }
         .btn { padding: 10px 20px; background: #007bff; color: white; border: none; border-radius: 4px; cursor: pointer; }
         .btn:hover { background: #0056b3; }
+        
+        .pager { margin-top: 20px; display: flex; gap: 10px; justify-content: center; }
+        
+        .search { margin-bottom: 20px; display: flex; gap: 10px; }
+        .search input[type="search"] { flex: 1; padding: 10px; border: 1px solid #ddd; border-radius: 4px; }
+        .search label { display: flex; align-items: center; gap: 5px; color: #666; white-space: nowrap; }
+        .search-info { margin-bottom: 20px; color: #666; }
+        .idea .snippet { color: #444; margin-bottom: 10px; font-style: italic; }
+        mark { background: #fff59d; padding: 0 2px; }
     </style>
 </head>
 <body>
@@ -71,23 +103,28 @@ HTML_TEMPLATE = '''
         <h1>💡 Idea Tracker</h1>
         
         <div class="stats">
-            <div class="stat"><strong>{{ stats.total }}</strong><span>Ideen</span></div>
-            <div class="stat"><strong>{{ stats.new }}</strong><span>Neu</span></div>
-            <div class="stat"><strong>{{ stats.interesting }}</strong><span>Interessant</span></div>
-            <div class="stat"><strong>{{ stats.validated }}</strong><span>Validiert</span></div>
-            <div class="stat"><strong>{{ stats.rejected }}</strong><span>Verworfen</span></div>
+            <div class="stat"><strong data-stat="total">{{ stats.total }}</strong><span>Ideen</span></div>
+            <div class="stat"><strong data-stat="new">{{ stats.new }}</strong><span>Neu</span></div>
+            <div class="stat"><strong data-stat="interesting">{{ stats.interesting }}</strong><span>Interessant</span></div>
+            <div class="stat"><strong data-stat="validated">{{ stats.validated }}</strong><span>Validiert</span></div>
+            <div class="stat"><strong data-stat="rejected">{{ stats.rejected }}</strong><span>Verworfen</span></div>
         </div>
         
+        <form class="search" method="GET" action="/search">
+            <input type="search" name="q" value="{{ query or '' }}" placeholder="Ideen durchsuchen...">
+            <label><input type="checkbox" name="archived" value="1"{% if include_archived %} checked{% endif %}> Archiv durchsuchen</label>
+            <button type="submit" class="btn">Suchen</button>
+        </form>
+        
+        {% for row in facet_rows %}
         <div class="filters">
-            <a href="/" class="filter {{ 'active' if not request.args.get('status') else '' }}">Alle</a>
-            <a href="/?status=new" class="filter {{ 'active' if request.args.get('status') == 'new' else '' }}">Neu</a>
-            <a href="/?status=interesting" class="filter {{ 'active' if request.args.get('status') == 'interesting' else '' }}">Interessant</a>
-            <a href="/?status=validated" class="filter {{ 'active' if request.args.get('status') == 'validated' else '' }}">Validiert</a>
-            <a href="/?status=reject" class="filter {{ 'active' if request.args.get('status') == 'reject' else '' }}">Verworfen</a>
+            {% for url, label, count, active in row %}<a href="{{ url }}" class="filter {{ 'active' if active else '' }}">{{ label }}{% if count is not none %} <small>{{ count }}</small>{% endif %}</a>{% endfor %}
         </div>
+        {% endfor %}
         
         <div class="add-form">
             <h2>Neue Idee hinzufügen</h2>
+            {% if error %}<p class="error">{{ error }}</p>{% endif %}
             <form method="POST" action="/add">
                 <div class="form-group">
                     <label>Titel</label>
@@ -127,11 +164,60 @@ HTML_TEMPLATE = '''
             </form>
         </div>
         
+        {% if query is not none %}
+        <p class="search-info">{{ count }} Treffer für „{{ query }}“{% if partial %} – mehr als {{ window }} Treffer,
+            nur die {{ window }} neuesten wurden nach Relevanz sortiert. Genauere Suchbegriffe finden auch ältere Ideen.{% endif %}</p>
+        {% endif %}
+        
         <div class="ideas">
-            {% for idea in ideas %}
-            <div class="idea">
+            {% for card in cards %}{{ card }}{% endfor %}
+        </div>
+        
+        <div class="pager">
+            {% if request.args.get('cursor') %}
+            <a href="{{ url_for('index', **filters) }}" class="filter">← Zum Anfang</a>
+            {% endif %}
+            {% if next_cursor %}
+            <a href="{{ url_for('index', cursor=next_cursor, **filters) }}" class="filter">Weitere Ideen →</a>
+            {% endif %}
+        </div>
+    </div>
+    <script>
+    // Status buttons post to the JSON endpoint and swap only their card;
+    // without JavaScript the form posts to /update and redirects.
+    document.addEventListener('submit', function (event) {
+        var form = event.target;
+        if (!form.classList.contains('status-form') || !event.submitter) return;
+        event.preventDefault();
+        var id = form.closest('.idea').dataset.id;
+        fetch('/api/ideas/' + id + '/status', {
+            method: 'POST',
+            body: new URLSearchParams({status: event.submitter.value})
+        }).then(function (response) {
+            if (!response.ok) throw new Error(response.status);
+            return response.json();
+        }).then(function (result) {
+            form.closest('.idea').outerHTML = result.card;
+            Object.keys(result.delta).forEach(function (key) {
+                var counter = document.querySelector('[data-stat="' + key + '"]');
+                if (counter) counter.textContent = Number(counter.textContent) + result.delta[key];
+            });
+        }).catch(function () {
+            form.submit();
+        });
+    });
+    </script>
+</body>
+</html>
+'''
+
+CARD_TEMPLATE = '''
+            <div class="idea" data-id="{{ idea.id }}">
                 <h3>{{ idea.title }}</h3>
                 <p class="problem">Problem: {{ idea.problem }}</p>
+                {% if idea.snippet %}
+                <p class="snippet">{{ idea.snippet|highlight }}</p>
+                {% endif %}
                 {% if idea.description %}
                 <p class="description">{{ idea.description }}</p>
                 {% endif %}
@@ -142,6 +228,7 @@ HTML_TEMPLATE = '''
                     <span>📅 {{ idea.created_at[:10] }}</span>
                     {% if idea.source %}<span>📌 {{ idea.source }}</span>{% endif %}
                     {% if idea.category %}<span class="tag">{{ idea.category }}</span>{% endif %}
+                    {% if idea.duplicate_of %}<span class="tag duplicate">Duplikat von #{{ idea.duplicate_of }}</span>{% endif %}
                 </div>
                 <form class="status-form" method="POST" action="/update/{{ idea.id }}">
                     <button type="submit" name="status" value="new" class="status-btn status-new">Neu</button>
@@ -150,22 +237,121 @@ HTML_TEMPLATE = '''
                     <button type="submit" name="status" value="reject" class="status-btn status-reject">Verwerfen</button>
                 </form>
             </div>
-            {% endfor %}
-        </div>
-    </div>
-</body>
-</html>
 '''
 
+@app.template_filter('highlight')
+def highlight(snippet):
+    """HTML-escape a search snippet and mark the matched words"""
+    return Markup(str(escape(snippet)).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>'))
+
+# Compiled once; render_template_string would parse and compile on every request
+PAGE = app.jinja_env.from_string(HTML_TEMPLATE)
+CARD = app.jinja_env.from_string(CARD_TEMPLATE)
+
+CARD_CACHE_SIZE = 5000  # rendered idea cards kept
+
+class CardCache:
+    """LRU of rendered idea cards keyed by id, updated_at, status and snippet
+    
+    updated_at only has second resolution, so routes that change an idea
+    also discard its cards explicitly.
+    """
+    
+    def __init__(self, max_entries=CARD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def render(self, idea):
+        key = (idea['id'], idea['updated_at'], idea['status'], idea.get('snippet'))
+        with self.lock:
+            card = self.entries.get(key)
+            if card is not None:
+                self.entries.move_to_end(key)
+                return card
+        card = Markup(CARD.render(idea=idea))
+        with self.lock:
+            self.entries[key] = card
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return card
+    
+    def discard(self, idea_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == idea_id]:
+                del self.entries[key]
+
+card_cache = CardCache()
+
+def render_page(ideas, filters=None, **context):
+    """Render the compiled page with Flask's template context and cached cards"""
+    filters = filters or {'status': None, 'category': None, 'source': None}
+    context['filters'] = {name: value for name, value in filters.items() if value}
+    context['facet_rows'] = facet_rows(filters, get_facets(**filters), lambda params: url_for('index', **params),
+                                       context.get('query') is None)
+    context['cards'] = [card_cache.render(idea) for idea in ideas]
+    context['count'] = len(ideas)
+    app.update_template_context(context)
+    return PAGE.render(context)
+
 @app.route('/')
 def index():
-    status = request.args.get('status')
-    if status:
-        ideas = get_ideas_by_status(status)
-    else:
-        ideas = get_all_ideas()
+    filters = {name: request.args.get(name) or None for name in ('status', 'category', 'source')}
+    try:
+        ideas, next_cursor = get_ideas_page(filters['status'], request.args.get('cursor'),
+                                            category=filters['category'], source=filters['source'])
+    except ValueError:
+        abort(400)
     stats = get_stats()
-    return render_template_string(HTML_TEMPLATE, ideas=ideas, stats=stats)
+    return render_page(ideas, filters, next_cursor=next_cursor, stats=stats, query=None)
+
+@app.route('/search')
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return redirect(url_for('index'))
+    include_archived = request.args.get('archived') == '1'
+    ideas, partial = search_ideas(query, include_archived=include_archived)
+    stats = get_stats()
+    return render_page(ideas, next_cursor=None, stats=stats, query=query, partial=partial, window=SEARCH_WINDOW,
+                       include_archived=include_archived)
+
+@app.route('/api/ideas')
+@app.route('/api/ideas.ndjson', endpoint='api_ideas_ndjson')
+def api_ideas():
+    try:
+        params = parse_ideas_query(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    ndjson = request.endpoint == 'api_ideas_ndjson'
+    version, _ = get_data_version()
+    etag = hashlib.sha1(f"{version}:{ndjson}:{params!r}".encode()).hexdigest()[:20]
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    if ndjson:
+        response = Response(render_ideas_ndjson(**params), mimetype='application/x-ndjson')
+    else:
+        response = Response(b''.join(render_ideas_page(**params)), mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/changes')
+def api_changes():
+    """Ideas changed after ?since=<seq>; 410 when the mirror has to sync again from 0"""
+    try:
+        params = parse_changes_query(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    version, _ = get_data_version()
+    etag = hashlib.sha1(f"{version}:changes:{params!r}".encode()).hexdigest()[:20]
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    try:
+        response = Response(b''.join(render_changes(**params)), mimetype='application/json')
+    except ChangesCompacted as e:
+        return jsonify(error='Change feed compacted, sync again from since=0', reset=True, min_seq=e.min_seq), 410
+    response.set_etag(etag)
+    return response
 
 @app.route('/add', methods=['POST'])
 def add():
@@ -176,15 +362,47 @@ def add():
     source = request.form.get('source', '')
     category = request.form.get('category', '')
     
-    add_idea(title, problem, description, existing_solutions, source, category)
+    try:
+        idea_id = add_idea(title, problem, description, existing_solutions, source, category, on_duplicate='flag')
+    except ValueError:
+        ideas, next_cursor = get_ideas_page()
+        return render_page(ideas, next_cursor=next_cursor, stats=get_stats(), query=None,
+                           error='Titel und Problem dürfen nicht leer sein.'), 400
+    card_cache.discard(idea_id)
     return redirect(url_for('index'))
 
 @app.route('/update/<int:idea_id>', methods=['POST'])
 def update(idea_id):
     status = request.form.get('status')
     update_idea_status(idea_id, status)
+    card_cache.discard(idea_id)
     return redirect(url_for('index'))
 
+@app.route('/api/ideas/<int:idea_id>/status', methods=['POST'])
+def api_update_status(idea_id):
+    """Change one idea's status; returns its re-rendered card and the stats delta"""
+    try:
+        _, delta = update_ideas_status([idea_id], request.form.get('status', ''))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    card_cache.discard(idea_id)
+    ideas = get_ideas_by_ids([idea_id])
+    if not ideas:
+        return jsonify(error='Idea not found'), 404
+    return jsonify(id=idea_id, status=ideas[0]['status'], card=str(card_cache.render(ideas[0])), delta=delta)
+
+@app.route('/api/ideas/status', methods=['POST'])
+def api_update_statuses():
+    """Change the status of comma-separated ids in one transaction"""
+    try:
+        ids = [int(value) for value in request.form.get('ids', '').split(',') if value.strip()]
+        changed, delta = update_ideas_status(ids, request.form.get('status', ''))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    for idea_id in changed:
+        card_cache.discard(idea_id)
+    return jsonify(updated=changed, delta=delta)
+
 if __name__ == '__main__':
     init_db()
     print("Idea Tracker läuft auf http://127.0.0.1:5000")
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Idea Tracker - Online Backups
+Snapshots ideas.db with the SQLite backup API while the server keeps running
+
+    python backup.py create            write a snapshot now
+    python backup.py list              show the snapshots, newest first
+    python backup.py verify [FILE]     integrity-check a snapshot (default: newest)
+    python backup.py restore FILE      copy a snapshot back into the database
+
+Snapshots are gzip-compressed database files named ideas-<UTC time>.db.gz.
+server.py only takes them on a schedule when BACKUP_INTERVAL is set, e.g.
+BACKUP_INTERVAL=21600 BACKUP_DIR=/var/backups/ideas for every six hours.
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database
+from metrics import Counter, Gauge, Histogram
+
+BACKUP_DIR = Path(os.environ.get("BACKUP_DIR") or Path(__file__).parent / "backups")
+BACKUP_INTERVAL = float(os.environ.get("BACKUP_INTERVAL", 0))  # seconds between snapshots, 0 = off
+BACKUP_KEEP = int(os.environ.get("BACKUP_KEEP", 14))  # newest snapshots kept
+
+# The copy runs inside one read transaction, so it sees a single snapshot
+# and in WAL mode never blocks writers. Copying a few pages per step with a
+# pause in between keeps its I/O from crowding out request handling.
+STEP_PAGES = 1024
+STEP_PAUSE = 0.005
+SNAPSHOT_PATTERN = "ideas-*.db.gz"
+
+BACKUP_SECONDS = Histogram('idea_tracker_backup_seconds', 'Time taken by snapshots',
+                           buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300))
+BACKUPS = Counter('idea_tracker_backups', 'Snapshots by outcome', ['outcome'])
+last_success = {'time': 0.0}
+Gauge('idea_tracker_backup_last_success_timestamp', 'Unix time of the last successful snapshot',
+      func=lambda: last_success['time'])
+
+class BackupError(Exception):
+    pass
+
+def snapshots(directory=BACKUP_DIR):
+    """Snapshot files, newest first"""
+    return sorted(Path(directory).glob(SNAPSHOT_PATTERN), reverse=True)
+
+def copy_database(source_path, target_path, step_pages=STEP_PAGES, pause=STEP_PAUSE):
+    """Copy a live database with the backup API, step_pages pages at a time"""
+    source = sqlite3.connect(source_path, timeout=database.BUSY_TIMEOUT)
+    target = sqlite3.connect(target_path)
+    try:
+        # Pin one read snapshot for the whole copy; otherwise every write by
+        # another connection would restart the backup from the first page.
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(target, pages=step_pages, progress=lambda status, remaining, total: time.sleep(pause))
+        source.rollback()
+    finally:
+        target.close()
+        source.close()
+
+def check_integrity(path, name=None):
+    """Run PRAGMA integrity_check on a database file; raises BackupError unless it is ok
+
+    Returns (ideas, archived): all ideas in the file, and how many of them
+    are in ideas_archive. Snapshots from before the archive count 0 archived.
+    """
+    name = name or path
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        ideas = conn.execute("SELECT COUNT(*) FROM ideas").fetchone()[0]
+        archived = 0
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ideas_archive'").fetchone():
+            archived = conn.execute("SELECT COUNT(*) FROM ideas_archive").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f"{name}: {e}") from None
+    finally:
+        conn.close()
+    if result != ['ok']:
+        raise BackupError(f"{name}: integrity check failed: {'; '.join(result[:5])}")
+    return ideas + archived, archived
+
+def create_backup(directory=BACKUP_DIR, keep=BACKUP_KEEP, label=None):
+    """Write a compressed, verified snapshot of the database; returns its path
+
+    Snapshots beyond the newest keep are deleted afterwards.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    name = f"ideas-{stamp}{f'-{label}' if label else ''}.db.gz"
+    started = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(dir=directory) as scratch:
+            copy = Path(scratch) / "ideas.db"
+            copy_database(database.DB_PATH, copy)
+            check_integrity(copy)
+            partial = Path(scratch) / name
+            with open(copy, "rb") as raw, gzip.open(partial, "wb", compresslevel=6) as packed:
+                shutil.copyfileobj(raw, packed, 1024 * 1024)
+            path = directory / name
+            os.replace(partial, path)
+    except Exception:
+        BACKUPS.labels('error').inc()
+        raise
+    BACKUP_SECONDS.observe(time.perf_counter() - started)
+    BACKUPS.labels('ok').inc()
+    last_success['time'] = time.time()
+    for old in snapshots(directory)[keep:]:
+        old.unlink(missing_ok=True)
+    return path
+
+def unpack(snapshot, directory):
+    """Decompress a snapshot into directory; returns the database path"""
+    target = Path(directory) / "restore.db"
+    try:
+        with gzip.open(snapshot, "rb") as packed, open(target, "wb") as raw:
+            shutil.copyfileobj(packed, raw, 1024 * 1024)
+    except (OSError, EOFError) as e:
+        raise BackupError(f"{snapshot}: {e}") from None
+    return target
+
+def verify_backup(snapshot):
+    """Decompress and integrity-check a snapshot; returns (ideas, archived) as check_integrity"""
+    with tempfile.TemporaryDirectory() as scratch:
+        return check_integrity(unpack(snapshot, scratch), snapshot)
+
+def restore_backup(snapshot, directory=BACKUP_DIR):
+    """Replace the database contents with a verified snapshot; returns the safety snapshot
+
+    The current database is snapshotted first. The copy goes through the
+    backup API into the live file, so a running server sees either the old
+    or the restored data. Afterwards ideas_version and the change feed are
+    moved past their pre-restore values: caches and ETags cannot match
+    again, and mirrors are told to sync from scratch.
+    """
+    safety = create_backup(directory, keep=BACKUP_KEEP + 1, label="pre-restore")
+    with tempfile.TemporaryDirectory() as scratch:
+        restored = unpack(snapshot, scratch)
+        check_integrity(restored, snapshot)
+        conn = sqlite3.connect(database.DB_PATH, timeout=database.BUSY_TIMEOUT)
+        try:
+            version = conn.execute("SELECT value FROM meta WHERE key = 'ideas_version'").fetchone()[0]
+            head = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'changes'").fetchone()[0]
+            source = sqlite3.connect(restored)
+            try:
+                source.backup(conn)
+            finally:
+                source.close()
+        finally:
+            conn.close()
+    # The snapshot may predate tables added since; init_db migrates it
+    database.close_db()
+    database.init_db()
+    with database.transaction() as conn:
+        conn.execute("UPDATE meta SET value = MAX(value, ?) + 1, updated_at = CURRENT_TIMESTAMP "
+                     "WHERE key = 'ideas_version'", (version,))
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) + 1 WHERE name = 'changes'", (head,))
+        conn.execute("UPDATE meta SET value = (SELECT seq FROM sqlite_sequence WHERE name = 'changes') "
+                     "WHERE key = 'changes_min_seq'")
+    return safety
+
+class BackupScheduler:
+    """Background thread writing a snapshot every interval seconds"""
+
+    def __init__(self, interval=BACKUP_INTERVAL, directory=BACKUP_DIR, keep=BACKUP_KEEP):
+        self.interval = interval
+        self.directory = directory
+        self.keep = keep
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="backup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                create_backup(self.directory, self.keep)
+            except Exception as e:
+                print(f"⚠️ Backup failed: {e}", file=sys.stderr)
+
+def describe(path):
+    stat = path.stat()
+    written = datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+    return f"{path.name}  {stat.st_size / 1024:.0f} KiB  {written}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Idea Tracker online backups")
+    parser.add_argument("--dir", type=Path, default=BACKUP_DIR, help=f"snapshot directory (default: {BACKUP_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="write a snapshot now")
+    create.add_argument("--keep", type=int, default=BACKUP_KEEP, help="newest snapshots to keep")
+    commands.add_parser("list", help="show snapshots, newest first")
+    verify = commands.add_parser("verify", help="integrity-check a snapshot")
+    verify.add_argument("snapshot", nargs="?", type=Path, help="default: the newest")
+    restore = commands.add_parser("restore", help="replace the database contents with a snapshot")
+    restore.add_argument("snapshot", type=Path)
+    restore.add_argument("--yes", action="store_true", help="do not ask for confirmation")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "create":
+            database.init_db()
+            path = create_backup(args.dir, args.keep)
+            print(f"✅ {describe(path)}")
+        elif args.command == "list":
+            for path in snapshots(args.dir):
+                print(describe(path))
+        elif args.command == "verify":
+            snapshot = args.snapshot or next(iter(snapshots(args.dir)), None)
+            if snapshot is None:
+                raise BackupError(f"no snapshots in {args.dir}")
+            ideas, archived = verify_backup(snapshot)
+            print(f"✅ {snapshot.name}: ok, {ideas} ideas ({archived} archived)")
+        else:
+            if not args.yes and input(f"Replace {database.DB_PATH} with {args.snapshot.name}? [y/N] ").lower() != "y":
+                return 1
+            safety = restore_backup(args.snapshot, args.dir)
+            print(f"✅ Restored {args.snapshot.name}; previous data saved as {safety.name}")
+    except BackupError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Idea Tracker - Benchmarks
+Synthetic data, database micro-benchmarks and an HTTP load generator
+
+    python -m bench seed --rows 100000
+    python -m bench micro
+    python -m bench load --target server --duration 20
+
+Everything runs against bench.db (or --db), never the real ideas.db, and
+reports JSON so runs can be diffed for regressions.
+"""
+
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB = ROOT / "bench.db"
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, elapsed, errors=0):
+    """Throughput and latency percentiles (milliseconds) of timed operations"""
+    values = sorted(latencies)
+    ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "ops_per_sec": round(len(values) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(values, 0.50)),
+        "p95_ms": ms(percentile(values, 0.95)),
+        "p99_ms": ms(percentile(values, 0.99)),
+        "max_ms": ms(values[-1] if values else None),
+    }
+
+def timed(func, repeat):
+    """Call func repeat times; returns the summary of the individual calls"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - started)
@@ -0,0 +1,83 @@
+"""
+Command line entry point: python -m bench {seed,micro,load}
+"""
+
+import argparse
+import json
+import platform
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import database
+from bench import DEFAULT_DB
+
+def row_count(text):
+    """Parse 1000, 100k or 1M"""
+    text = text.strip().lower()
+    factor = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    try:
+        return int(float(text.rstrip("km")) * factor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a row count: {text!r}") from None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Idea Tracker benchmarks")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help=f"database to use (default: {DEFAULT_DB.name})")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="fill the database with synthetic ideas")
+    seed.add_argument("--rows", type=row_count, default=1000, help="number of ideas, e.g. 1k, 100k, 1M")
+    seed.add_argument("--seed", type=int, default=0)
+    seed.add_argument("--fresh", action="store_true", help="delete the database first")
+
+    micro = commands.add_parser("micro", help="time each database function")
+    micro.add_argument("--repeat", type=int, default=200)
+    micro.add_argument("--only", nargs="*", help="benchmark names to run")
+
+    load = commands.add_parser("load", help="drive server.py or app.py over HTTP")
+    load.add_argument("--target", choices=("server", "app"), default="server")
+    load.add_argument("--url", help="use an already running server instead of starting one")
+    load.add_argument("--concurrency", type=int, default=16)
+    load.add_argument("--duration", type=float, default=10.0, help="seconds")
+    load.add_argument("--password", help="login password for server.py")
+    args = parser.parse_args(argv)
+
+    if args.db.resolve() == (Path(database.__file__).parent / "ideas.db").resolve():
+        parser.error("refusing to benchmark against the real ideas.db")
+    if getattr(args, "fresh", False):
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{args.db}{suffix}").unlink(missing_ok=True)
+    database.DB_PATH = args.db
+
+    if args.command == "seed":
+        from bench import seed as seeding
+        results = seeding.seed(args.rows, args.seed)
+    elif args.command == "micro":
+        from bench import micro
+        results = micro.run(args.repeat, args.only)
+    else:
+        from bench import load as loading
+        results = loading.run(args.target, args.url, args.concurrency, args.duration, args.password)
+
+    database.init_db()
+    report = {
+        "command": args.command,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "rows": database.get_stats()["total"],
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Concurrent HTTP load generator for server.py and app.py
+"""
+
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import database
+from bench import ROOT, summarize
+
+SEARCH_TERMS = ["rechnung", "termin", "freelancer", "verwaltung", "excel"]
+
+# (route name, weight); "toggle" changes an idea's status the way each UI does
+MIX = [
+    ("index", 40),
+    ("filter", 15),
+    ("search", 15),
+    ("api", 15),
+    ("toggle", 10),
+    ("api_large_page", 5),
+]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def spawn(target, port):
+    """Start server.py or app.py on port against the current database; returns the process"""
+    env = dict(os.environ, IDEA_TRACKER_DB=str(database.DB_PATH), PORT=str(port))
+    if target == "server":
+        command = [sys.executable, "server.py"]
+    else:
+        command = [sys.executable, "-c",
+                   f"import app; app.init_db(); app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{target} exited with status {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{target} did not start listening on port {port}")
+
+class Client:
+    """One keep-alive connection, logged in once, issuing requests from the mix"""
+
+    def __init__(self, target, host, port, password, max_id, rng):
+        self.target, self.host, self.port = target, host, port
+        self.password, self.max_id, self.rng = password, max_id, rng
+        self.conn = None
+        self.cookie = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            self.conn.request(method, path, body, headers)
+            response = self.conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            raise
+        if response.getheader("Connection", "").lower() == "close":
+            self.conn.close()
+            self.conn = None
+        return response
+
+    def login(self):
+        if self.target != "server":
+            return  # app.py has no login
+        response = self.request("POST", "/login", urlencode({"password": self.password}),
+                                {"Content-Type": "application/x-www-form-urlencoded"})
+        cookie = response.getheader("Set-Cookie")
+        if not cookie:
+            raise RuntimeError("login failed; pass the right --password")
+        self.cookie = cookie.split(";", 1)[0]
+
+    def run(self, route):
+        rng = self.rng
+        if route == "index":
+            return self.request("GET", "/")
+        if route == "filter":
+            return self.request("GET", "/?" + urlencode({"status": rng.choice(database.STATUSES)}))
+        if route == "search":
+            return self.request("GET", "/search?" + urlencode({"q": rng.choice(SEARCH_TERMS)}))
+        if route == "api":
+            return self.request("GET", "/api/ideas?limit=50&fields=id,title,status")
+        if route == "api_large_page":
+            return self.request("GET", "/api/ideas?limit=500")
+        idea_id, status = rng.randint(1, self.max_id), rng.choice(database.STATUSES)
+        if self.target == "server":
+            return self.request("GET", f"/status/{idea_id}/{status}")
+        return self.request("POST", f"/update/{idea_id}", urlencode({"status": status}),
+                            {"Content-Type": "application/x-www-form-urlencoded"})
+
+def run(target="server", url=None, concurrency=16, duration=10.0, password=None, seed=0):
+    """Drive a server for duration seconds; returns overall and per-route summaries
+
+    Without url the target is started on a free port against the current
+    database and stopped afterwards.
+    """
+    database.init_db()
+    max_id = database.get_db().execute("SELECT MAX(id) FROM ideas").fetchone()[0] or 1
+    if password is None and target == "server":
+        from server import PASSWORD as password
+
+    process = None
+    if url:
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        process = spawn(target, port)
+
+    routes, weights = zip(*MIX)
+    latencies = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+    status_codes = {}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = Client(target, host, port, password, max_id, rng)
+        client.login()
+        local = {route: [] for route in routes}
+        local_errors = {route: 0 for route in routes}
+        local_codes = {}
+        while time.monotonic() < stop_at:
+            route = rng.choices(routes, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = client.run(route)
+            except (OSError, http.client.HTTPException):
+                local_errors[route] += 1
+                continue
+            local[route].append(time.perf_counter() - started)
+            local_codes[response.status] = local_codes.get(response.status, 0) + 1
+            if response.status >= 500:
+                local_errors[route] += 1
+        with lock:
+            for route in routes:
+                latencies[route].extend(local[route])
+                errors[route] += local_errors[route]
+            for code, count in local_codes.items():
+                status_codes[code] = status_codes.get(code, 0) + count
+
+    try:
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    everything = [latency for values in latencies.values() for latency in values]
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "overall": summarize(everything, elapsed, sum(errors.values())),
+        "routes": {route: summarize(latencies[route], elapsed, errors[route]) for route in routes},
+        "status_codes": {str(code): count for code, count in sorted(status_codes.items())},
+    }
@@ -0,0 +1,51 @@
+"""
+Micro-benchmarks of the database.py functions against a seeded database
+"""
+
+import itertools
+import random
+
+import database
+from bench import timed
+
+SEARCH_TERMS = ["rechnung", "termin", "freelancer", "verwaltung", "fa", "excel papier"]
+
+def benchmarks(rng):
+    """(name, callable) pairs; write benchmarks keep the data set's shape"""
+    db = database.get_db()
+    max_id = db.execute("SELECT MAX(id) FROM ideas").fetchone()[0] or 1
+    deep = db.execute(
+        "SELECT * FROM ideas ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+        (db.execute("SELECT COUNT(*) FROM ideas").fetchone()[0] // 2,)
+    ).fetchone()
+    deep_cursor = database.encode_cursor(deep) if deep else None
+    terms = itertools.cycle(SEARCH_TERMS)
+    statuses = itertools.cycle(database.STATUSES)
+
+    return [
+        ("get_ideas_page", lambda: database.get_ideas_page()),
+        ("get_ideas_page_status", lambda: database.get_ideas_page("interesting")),
+        ("get_ideas_page_deep_cursor", lambda: database.get_ideas_page(cursor=deep_cursor)),
+        ("get_ideas_page_projection", lambda: database.get_ideas_page(fields=("id", "title", "status"))),
+        ("iter_ideas_1000", lambda: list(itertools.islice(database.iter_ideas(), 1000))),
+        ("search_ideas", lambda: database.search_ideas(next(terms))),
+        ("get_stats", database.get_stats),
+        ("get_category_stats", database.get_category_stats),
+        ("get_categories", database.get_categories),
+        ("get_data_version", database.get_data_version),
+        ("update_idea_status", lambda: database.update_idea_status(rng.randint(1, max_id), next(statuses))),
+        ("add_idea", lambda: database.add_idea(
+            f"Benchmark Idee {rng.random()}", f"Messung {rng.random()}", source="bench", on_duplicate='flag')),
+    ]
+
+def run(repeat=200, only=None, seed=0):
+    """Time every benchmark (or those named in only); returns {name: summary}"""
+    database.init_db()
+    rng = random.Random(seed)
+    results = {}
+    for name, func in benchmarks(rng):
+        if only and name not in only:
+            continue
+        func()  # warm caches and prepared statements
+        results[name] = timed(func, repeat)
+    return results
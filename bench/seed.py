@@ -0,0 +1,91 @@
+"""
+Synthetic ideas with German text and realistic status/category mix
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+import database
+
+STATUS_WEIGHTS = {"new": 60, "interesting": 20, "reject": 15, "validated": 5}
+CATEGORY_WEIGHTS = {
+    "productivity": 22, "business": 18, "finance": 14, "tech": 12, "lifestyle": 10,
+    "health": 8, "communication": 7, "education": 6, "security": 3,
+}
+SOURCES = ["Web Research", "Reddit", "Hacker News", "Eigene Erfahrung", "Kundengespräch", "Twitter"]
+
+ADJECTIVES = [
+    "automatische", "einfache", "smarte", "gemeinsame", "digitale", "mobile", "persönliche",
+    "lokale", "sichere", "schnelle", "transparente", "nachhaltige", "flexible", "günstige",
+]
+NOUNS = [
+    "Rechnungsstellung", "Terminplanung", "Lagerverwaltung", "Essensplanung", "Datensicherung",
+    "Nebenkostenabrechnung", "Vereinsverwaltung", "Schichtplanung", "Belegerfassung", "Kundenkartei",
+    "Haushaltsbuch", "Reisekostenabrechnung", "Urlaubsplanung", "Dokumentenablage", "Mitgliederverwaltung",
+    "Angebotserstellung", "Zeiterfassung", "Inventur", "Fahrtenbuch", "Wartungsplanung", "Rezeptverwaltung",
+    "Mietverwaltung", "Bewerbungsverwaltung", "Spendenverwaltung", "Elternabend", "Arzttermine",
+    "Steuererklärung", "Vertragsverwaltung", "Paketverfolgung", "Kassenbuch", "Lernplanung",
+]
+GROUPS = [
+    "Freelancer", "Handwerker", "Vereine", "Familien", "Studierende", "kleine Teams", "Arztpraxen",
+    "Vermieter", "Gastronomen", "Pflegedienste", "Lehrkräfte", "Fotografen", "Landwirte", "Agenturen",
+]
+PROBLEMS = [
+    "{group} verlieren jede Woche Stunden mit {noun}",
+    "{noun} ist für {group} unübersichtlich und fehleranfällig",
+    "{group} machen {noun} noch mit Excel und Papier",
+    "Bestehende Tools für {noun} sind für {group} zu teuer",
+    "{group} vergessen Fristen bei der {noun}",
+    "Bei der {noun} fehlt {group} der Überblick über offene Punkte",
+]
+DESCRIPTIONS = [
+    "App, die {noun} für {group} automatisiert und an Fristen erinnert",
+    "Web-Tool mit Vorlagen für {noun}, Export nach PDF und DATEV",
+    "Einfache Lösung für {noun} mit gemeinsamer Ansicht für das ganze Team",
+    "Assistent, der {noun} aus E-Mails und Fotos erkennt und vorbereitet",
+]
+# Words for the free-text detail that makes each idea its own
+DETAILS = (
+    "Kunden Lieferanten Mitarbeiter Rechnungen Belege Fristen Termine Angebote Aufträge Verträge Formulare "
+    "Listen Tabellen Ordner Erinnerungen Nachrichten Anrufe Fotos Notizen Zettel Kalender Budgets Kosten "
+    "Preise Rabatte Mahnungen Zahlungen Überweisungen Quittungen Protokolle Berichte Statistiken Auswertungen "
+    "Schichten Dienstpläne Urlaube Krankmeldungen Bestellungen Lieferungen Retouren Pakete Räume Geräte "
+    "Fahrzeuge Maschinen Ersatzteile Wartungen Prüfungen Zertifikate Schulungen Kurse Hausaufgaben Noten "
+    "Elternbriefe Spenden Mitglieder Beiträge Versammlungen Wahlen Satzungen Förderanträge Steuern Abgaben "
+    "täglich wöchentlich monatlich ständig manuell doppelt verstreut veraltet unvollständig handschriftlich "
+    "per WhatsApp per E-Mail auf Papier in Excel im Kopf am Telefon im Büro unterwegs nachts am Wochenende"
+).split()
+SOLUTIONS = ["Excel", "Notion", "Trello", "lexoffice", "sevDesk", "Google Sheets", "Papierordner", "Asana"]
+
+def fake_idea(rng, now):
+    noun, group = rng.choice(NOUNS), rng.choice(GROUPS)
+    words = {"noun": noun, "group": group}
+    created = now - timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600))
+    return {
+        "title": f"{rng.choice(ADJECTIVES).capitalize()} {noun} für {group}",
+        "problem": f"{rng.choice(PROBLEMS).format(**words)}: {' '.join(rng.sample(DETAILS, 8))}",
+        "description": rng.choice(DESCRIPTIONS).format(**words),
+        "existing_solutions": ", ".join(rng.sample(SOLUTIONS, 2)),
+        "source": rng.choice(SOURCES),
+        "category": rng.choices(list(CATEGORY_WEIGHTS), weights=CATEGORY_WEIGHTS.values())[0],
+        "status": rng.choices(list(STATUS_WEIGHTS), weights=STATUS_WEIGHTS.values())[0],
+        "created_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+def generate(rows, seed=0):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    for _ in range(rows):
+        yield fake_idea(rng, now)
+
+def seed(rows, seed=0, quiet=False):
+    """Fill the current database with rows synthetic ideas; returns the ingest counts"""
+    database.init_db()
+
+    def progress(counts):
+        if not quiet:
+            print(f"  {sum(counts.values())}/{rows} ideas", file=sys.stderr)
+
+    # Flag rather than skip duplicates so exactly `rows` ideas end up stored
+    return database.add_ideas_bulk(generate(rows, seed), batch_size=5000, on_duplicate='flag', progress=progress)
@@ -0,0 +1,72 @@
+"""
+Idea Tracker - Compression
+Content-Encoding negotiation and gzip/brotli helpers for the server and the static build
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional, gzip alone is stdlib
+    brotli = None
+
+# In order of preference
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+MIN_COMPRESS_SIZE = 1024  # smaller bodies are not worth the CPU or the header
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # fast enough per request; the static build uses the maximum
+FLUSH_EVERY = 16 * 1024  # input bytes between flushes while streaming
+
+def negotiate(accept_encoding, available=ENCODINGS):
+    """Pick the preferred available encoding the client accepts, or None"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get('*', 0.0)
+    candidates = [(accepted.get(enc, wildcard), -rank, enc) for rank, enc in enumerate(available)]
+    quality, _, encoding = max(candidates, default=(0.0, 0, None))
+    return encoding if quality > 0 else None
+
+def _compressor(encoding, best=False):
+    if encoding == 'br':
+        return brotli.Compressor(quality=11 if best else BROTLI_QUALITY)
+    # wbits=31 writes a gzip header and trailer
+    return zlib.compressobj(9 if best else GZIP_LEVEL, zlib.DEFLATED, 31)
+
+def compress(data, encoding, best=False):
+    """Compress a complete body"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if best else BROTLI_QUALITY)
+    compressor = _compressor(encoding, best)
+    return compressor.compress(data) + compressor.flush()
+
+def compress_stream(chunks, encoding):
+    """Compress a stream of chunks, flushing regularly so the client can start rendering"""
+    compressor = _compressor(encoding)
+    if encoding == 'br':
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    unflushed = 0
+    for chunk in chunks:
+        out = process(chunk)
+        unflushed += len(chunk)
+        if unflushed >= FLUSH_EVERY:
+            out += flush()
+            unflushed = 0
+        if out:
+            yield out
+    yield finish()
@@ -3,20 +3,188 @@ Idea Tracker - Database Module
 Stores business ideas and research findings
 """
 
+import os
 import sqlite3
+import sys
+import re
 import json
+import time
+import zlib
+import hashlib
+import base64
+import threading
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
-DB_PATH = Path(__file__).parent / "ideas.db"
+import dedup
+from metrics import Histogram, timed
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+DB_CALL_SECONDS = Histogram('idea_tracker_db_call_seconds', 'Time spent in database.py functions', ['function'])
+
+def instrumented(func):
+    """Record the duration of every call to func"""
+    return timed(DB_CALL_SECONDS.labels(func.__name__))(func)
+
+DB_PATH = Path(os.environ.get("IDEA_TRACKER_DB") or Path(__file__).parent / "ideas.db")
+
+# Connections are long-lived and owned by one thread at a time; the sqlite3
+# module keeps a per-connection cache of prepared statements keyed by SQL
+# text, so the constant query strings below are only compiled once per
+# connection. Servers that start a thread per request hand connections back
+# with release_db(), so the next request reuses them instead of connecting.
+STATEMENT_CACHE_SIZE = 256
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))  # idle connections kept by release_db()
+BUSY_TIMEOUT = 30  # seconds a writer waits for the lock before failing
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",      # readers no longer block behind the writer
+    "PRAGMA synchronous = NORMAL",    # safe with WAL, avoids an fsync per commit
+    "PRAGMA cache_size = -16000",     # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 134217728",   # map up to 128 MB of the file
+    "PRAGMA temp_store = MEMORY",
+)
+
+PAGE_SIZE = 50
+
+# Search snippets mark matches with these control characters so callers can
+# HTML-escape the text first and then swap in their own highlight markup.
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+SEARCH_WINDOW = 1000  # newest matches that get ranked
+
+# Web search results are reused for RESEARCH_CACHE_TTL seconds; past
+# RESEARCH_CACHE_MAX_BYTES of compressed payload the least recently used go
+RESEARCH_CACHE_TTL = 20 * 3600
+RESEARCH_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Columns callers may project; fingerprints stay internal
+PUBLIC_FIELDS = ('id', 'title', 'problem', 'description', 'existing_solutions', 'source', 'category',
+                 'status', 'created_at', 'updated_at', 'research_notes', 'duplicate_of')
+EXPORT_BATCH_SIZE = 500
+
+STATUSES = ('new', 'interesting', 'reject', 'validated')
+BULK_BATCH_SIZE = 1000
+BULK_WAL_CHECKPOINT = 10000  # WAL pages between checkpoints while bulk loading (SQLite default: 1000)
+
+# What to do when an added idea duplicates a stored one
+DUPLICATE_ACTIONS = ('skip', 'merge', 'flag')
+IDEA_FIELDS = ('title', 'problem', 'description', 'existing_solutions', 'source', 'category', 'research_notes')
+MERGE_FIELDS = ('description', 'existing_solutions', 'source', 'category', 'research_notes')
+SQL_VARIABLE_CHUNK = 500  # values per IN (...) list
+
+# Common phrasing fills some LSH buckets with thousands of ideas. To keep
+# the near-duplicate check at constant cost per idea, only the newest
+# LSH_BUCKET_LIMIT members of a bucket are candidates, and only the
+# LSH_MAX_COMPARISONS candidates sharing the most buckets are compared.
+LSH_BUCKET_LIMIT = 64
+LSH_MAX_COMPARISONS = 128
+
+# Entries of deleted ideas stay in the change feed this long; mirrors that
+# fall further behind have to sync again from the start.
+CHANGES_RETENTION_DAYS = 30
+
+# Hot/cold split: ideas rejected (last touched) longer ago than this move to
+# ideas_archive, so listings of the live statuses and the indexes behind them
+# stay small. Research log findings older than RESEARCH_COMPRESS_DAYS are
+# stored zlib-compressed.
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVED_STATUS = 'reject'
+RESEARCH_COMPRESS_DAYS = 30
+RESEARCH_COMPRESS_MIN_BYTES = 256
+IDEA_COLUMNS = ('id', 'title', 'problem', 'description', 'existing_solutions', 'source', 'category', 'status',
+                'created_at', 'updated_at', 'research_notes', 'content_hash', 'minhash', 'duplicate_of')
+
+class ChangesCompacted(Exception):
+    """The change feed was compacted past the sequence number a client asked for"""
+    
+    def __init__(self, since, min_seq):
+        super().__init__(f"Changes up to {min_seq} were compacted; sync again from 0 (asked for {since})")
+        self.since = since
+        self.min_seq = min_seq
+
+_local = threading.local()
+_pool = []  # (path, connection) pairs handed back by release_db()
+_pool_lock = threading.Lock()
+
+def _connect():
+    # Pooled connections move between threads, though never used by two at once
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     return conn
 
-def init_db():
+def _checkout():
+    """A pooled connection to DB_PATH, or a new one"""
+    stale = []
+    with _pool_lock:
+        while _pool:
+            path, conn = _pool.pop()
+            if path == DB_PATH:
+                break
+            stale.append(conn)
+        else:
+            conn = None
+    for old in stale:
+        old.close()
+    return conn or _connect()
+
+def get_db():
+    """Return this thread's connection, taking it from the pool or opening it on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = _checkout()
+        _local.conn = conn
+        _local.path = DB_PATH
+    return conn
+
+def release_db():
+    """Hand this thread's connection to the pool for the next thread that needs one
+    
+    For servers running each request on a new thread; long-lived worker
+    threads just keep theirs. Beyond POOL_SIZE idle connections it is closed.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        return
+    _local.conn = None
+    if conn.in_transaction:
+        conn.rollback()
+    with _pool_lock:
+        if len(_pool) < POOL_SIZE:
+            _pool.append((_local.path, conn))
+            return
+    conn.close()
+
+def close_db():
+    """Close this thread's connection (it is reopened on the next call)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+@contextmanager
+def transaction():
+    """Run a block as one write transaction on this thread's connection"""
     conn = get_db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+@instrumented
+def init_db():
+    with transaction() as conn:
+        _create_schema(conn)
+
+def _create_schema(conn):
     c = conn.cursor()
     
     c.execute('''
@@ -45,6 +213,291 @@ def init_db():
         )
     ''')
     
+    # Listings are keyset-paginated on (created_at, id), optionally within a
+    # status, category, both, or a source; these indexes make every page a
+    # short range scan.
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ideas_created ON ideas (created_at, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ideas_status_created ON ideas (status, created_at, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ideas_category_created ON ideas (category, created_at, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ideas_status_category_created ON ideas (status, category, created_at, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ideas_source_created ON ideas (source, created_at, id)')
+    
+    # Cold storage for long-rejected ideas, same columns as ideas. Listings
+    # that can contain rejected ideas read both tables; everything else only
+    # touches the hot one.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ideas_archive (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            problem TEXT NOT NULL,
+            description TEXT,
+            existing_solutions TEXT,
+            source TEXT,
+            category TEXT,
+            status TEXT,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            research_notes TEXT,
+            content_hash TEXT,
+            minhash BLOB,
+            duplicate_of INTEGER,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ideas_archive_created ON ideas_archive (created_at, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ideas_archive_category_created ON ideas_archive (category, created_at, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ideas_archive_source_created ON ideas_archive (source, created_at, id)')
+    c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_ideas_archive_content_hash ON ideas_archive (content_hash)')
+    
+    # Materialized counters kept current by triggers, so get_stats() and the
+    # facet counts never scan the ideas table. status_counts holds one row
+    # per status, which keeps get_stats() a read of a few rows however many
+    # sources there are; facet_counts is keyed by (status, category, source).
+    if _table_exists(conn, 'idea_counts'):
+        # Single counter table from before the split: replaced by the two below
+        for name in ('ideas_counts_ai', 'ideas_counts_ad', 'ideas_counts_au',
+                     'ideas_archive_counts_ai', 'ideas_archive_counts_ad'):
+            c.execute(f'DROP TRIGGER IF EXISTS {name}')
+        c.execute('DROP TABLE idea_counts')
+    counts_existed = _table_exists(conn, 'status_counts') and _table_exists(conn, 'facet_counts')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS status_counts (
+            status TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS facet_counts (
+            status TEXT NOT NULL,
+            category TEXT NOT NULL,
+            source TEXT NOT NULL DEFAULT '',
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (status, category, source)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_counts_ai AFTER INSERT ON ideas BEGIN
+            INSERT INTO status_counts (status, count) VALUES (COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (status) DO UPDATE SET count = count + 1;
+            INSERT INTO facet_counts (status, category, source, count)
+            VALUES (COALESCE(NEW.status, ''), COALESCE(NEW.category, ''), COALESCE(NEW.source, ''), 1)
+            ON CONFLICT (status, category, source) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_counts_ad AFTER DELETE ON ideas BEGIN
+            UPDATE status_counts SET count = count - 1 WHERE status = COALESCE(OLD.status, '');
+            UPDATE facet_counts SET count = count - 1
+            WHERE status = COALESCE(OLD.status, '') AND category = COALESCE(OLD.category, '')
+              AND source = COALESCE(OLD.source, '');
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_counts_au AFTER UPDATE OF status, category, source ON ideas
+        WHEN OLD.status IS NOT NEW.status OR OLD.category IS NOT NEW.category OR OLD.source IS NOT NEW.source BEGIN
+            UPDATE status_counts SET count = count - 1
+            WHERE status = COALESCE(OLD.status, '') AND OLD.status IS NOT NEW.status;
+            INSERT INTO status_counts (status, count)
+            SELECT COALESCE(NEW.status, ''), 1 WHERE OLD.status IS NOT NEW.status
+            ON CONFLICT (status) DO UPDATE SET count = count + 1;
+            UPDATE facet_counts SET count = count - 1
+            WHERE status = COALESCE(OLD.status, '') AND category = COALESCE(OLD.category, '')
+              AND source = COALESCE(OLD.source, '');
+            INSERT INTO facet_counts (status, category, source, count)
+            VALUES (COALESCE(NEW.status, ''), COALESCE(NEW.category, ''), COALESCE(NEW.source, ''), 1)
+            ON CONFLICT (status, category, source) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    # Archived ideas keep being counted: moving one out of ideas decrements
+    # its counters, the insert into the archive increments them again.
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_archive_counts_ai AFTER INSERT ON ideas_archive BEGIN
+            INSERT INTO status_counts (status, count) VALUES (COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (status) DO UPDATE SET count = count + 1;
+            INSERT INTO facet_counts (status, category, source, count)
+            VALUES (COALESCE(NEW.status, ''), COALESCE(NEW.category, ''), COALESCE(NEW.source, ''), 1)
+            ON CONFLICT (status, category, source) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_archive_counts_ad AFTER DELETE ON ideas_archive BEGIN
+            UPDATE status_counts SET count = count - 1 WHERE status = COALESCE(OLD.status, '');
+            UPDATE facet_counts SET count = count - 1
+            WHERE status = COALESCE(OLD.status, '') AND category = COALESCE(OLD.category, '')
+              AND source = COALESCE(OLD.source, '');
+        END
+    ''')
+    if not counts_existed:
+        _rebuild_counts(conn)
+    
+    # Change counter bumped on every write to ideas; caches key on it so they
+    # also notice writes made by other processes (e.g. research.py).
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('ideas_version', 0)")
+    for event, name in (('INSERT', 'ai'), ('UPDATE', 'au'), ('DELETE', 'ad')):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS ideas_version_{name} AFTER {event} ON ideas BEGIN
+                UPDATE meta SET value = value + 1, updated_at = CURRENT_TIMESTAMP WHERE key = 'ideas_version';
+            END
+        ''')
+    
+    # Full-text index over the text columns. unicode61 with remove_diacritics
+    # folds case and umlauts ("Lösung" matches "losung"), prefix indexes keep
+    # short prefix queries from scanning the whole term list.
+    fts_existed = _table_exists(conn, 'ideas_fts')
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS ideas_fts USING fts5(
+            title, problem, description, existing_solutions,
+            content='ideas', content_rowid='id',
+            tokenize="unicode61 remove_diacritics 2",
+            prefix='2 3'
+        )
+    ''')
+    # Batch inserts index their rows with one INSERT ... SELECT, several
+    # times faster than the per-row trigger; fts_deferred is only set
+    # inside such a write transaction so other connections never see it.
+    c.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('fts_deferred', 0)")
+    trigger = c.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'ideas_fts_ai'").fetchone()
+    if trigger and 'fts_deferred' not in trigger[0]:
+        c.execute('DROP TRIGGER ideas_fts_ai')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_fts_ai AFTER INSERT ON ideas
+        WHEN (SELECT value FROM meta WHERE key = 'fts_deferred') = 0 BEGIN
+            INSERT INTO ideas_fts (rowid, title, problem, description, existing_solutions)
+            VALUES (NEW.id, NEW.title, NEW.problem, NEW.description, NEW.existing_solutions);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_fts_ad AFTER DELETE ON ideas BEGIN
+            INSERT INTO ideas_fts (ideas_fts, rowid, title, problem, description, existing_solutions)
+            VALUES ('delete', OLD.id, OLD.title, OLD.problem, OLD.description, OLD.existing_solutions);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_fts_au AFTER UPDATE OF title, problem, description, existing_solutions ON ideas BEGIN
+            INSERT INTO ideas_fts (ideas_fts, rowid, title, problem, description, existing_solutions)
+            VALUES ('delete', OLD.id, OLD.title, OLD.problem, OLD.description, OLD.existing_solutions);
+            INSERT INTO ideas_fts (rowid, title, problem, description, existing_solutions)
+            VALUES (NEW.id, NEW.title, NEW.problem, NEW.description, NEW.existing_solutions);
+        END
+    ''')
+    if not fts_existed:
+        # Title hits weigh most, then the problem statement
+        c.execute("INSERT INTO ideas_fts (ideas_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 2.0, 1.0)')")
+        c.execute("INSERT INTO ideas_fts (ideas_fts) VALUES ('rebuild')")
+
+    # Archived ideas get their own index, so they stay out of the default
+    # search without making ideas_fts any larger; search_ideas() reads it
+    # only when asked to include them.
+    archive_fts_existed = _table_exists(conn, 'ideas_archive_fts')
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS ideas_archive_fts USING fts5(
+            title, problem, description, existing_solutions,
+            content='ideas_archive', content_rowid='id',
+            tokenize="unicode61 remove_diacritics 2",
+            prefix='2 3'
+        )
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_archive_fts_ai AFTER INSERT ON ideas_archive BEGIN
+            INSERT INTO ideas_archive_fts (rowid, title, problem, description, existing_solutions)
+            VALUES (NEW.id, NEW.title, NEW.problem, NEW.description, NEW.existing_solutions);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_archive_fts_ad AFTER DELETE ON ideas_archive BEGIN
+            INSERT INTO ideas_archive_fts (ideas_archive_fts, rowid, title, problem, description, existing_solutions)
+            VALUES ('delete', OLD.id, OLD.title, OLD.problem, OLD.description, OLD.existing_solutions);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_archive_fts_au AFTER UPDATE OF title, problem, description, existing_solutions ON ideas_archive BEGIN
+            INSERT INTO ideas_archive_fts (ideas_archive_fts, rowid, title, problem, description, existing_solutions)
+            VALUES ('delete', OLD.id, OLD.title, OLD.problem, OLD.description, OLD.existing_solutions);
+            INSERT INTO ideas_archive_fts (rowid, title, problem, description, existing_solutions)
+            VALUES (NEW.id, NEW.title, NEW.problem, NEW.description, NEW.existing_solutions);
+        END
+    ''')
+    if not archive_fts_existed:
+        c.execute("INSERT INTO ideas_archive_fts (ideas_archive_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 2.0, 1.0)')")
+        c.execute("INSERT INTO ideas_archive_fts (ideas_archive_fts) VALUES ('rebuild')")
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS research_cache (
+            key TEXT PRIMARY KEY,
+            backend TEXT NOT NULL,
+            query TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_research_cache_accessed ON research_cache (accessed_at)')
+    c.executemany("INSERT OR IGNORE INTO meta (key, value) VALUES (?, 0)",
+                  [('research_cache_hits',), ('research_cache_misses',)])
+    
+    # Duplicate detection: a unique normalized-content hash catches exact
+    # copies, MinHash signatures bucketed per LSH band find near copies
+    # without comparing against every stored idea.
+    columns = {r['name'] for r in c.execute('PRAGMA table_info(ideas)')}
+    for column, declaration in (('content_hash', 'TEXT'), ('minhash', 'BLOB'), ('duplicate_of', 'INTEGER')):
+        if column not in columns:
+            c.execute(f'ALTER TABLE ideas ADD COLUMN {column} {declaration}')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS idea_lsh (
+            bucket INTEGER NOT NULL,
+            idea_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, idea_id)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_idea_lsh_idea ON idea_lsh (idea_id)')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_lsh_ad AFTER DELETE ON ideas BEGIN
+            DELETE FROM idea_lsh WHERE idea_id = OLD.id;
+        END
+    ''')
+    if 'content_hash' not in columns:
+        _backfill_fingerprints(conn)
+    c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_ideas_content_hash ON ideas (content_hash)')
+    
+    # Change feed for mirrors: one row per idea at the sequence number of
+    # its latest insert, update or delete, so reading everything after a
+    # sequence number returns each changed idea once. Archiving counts as a
+    # change; the feed then serves the idea from ideas_archive. Rows of
+    # deleted ideas are tombstones until compact_changes() drops them and
+    # raises changes_min_seq past them.
+    changes_existed = _table_exists(conn, 'changes')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            idea_id INTEGER NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_changes_idea ON changes (idea_id)')
+    c.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('changes_min_seq', 0)")
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS ideas_changes_ai AFTER INSERT ON ideas BEGIN
+            INSERT INTO changes (idea_id) VALUES (NEW.id);
+        END
+    ''')
+    for event, name, row in (('UPDATE', 'au', 'NEW'), ('DELETE', 'ad', 'OLD')):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS ideas_changes_{name} AFTER {event} ON ideas BEGIN
+                DELETE FROM changes WHERE idea_id = {row}.id;
+                INSERT INTO changes (idea_id) VALUES ({row}.id);
+            END
+        ''')
+    if not changes_existed:
+        c.execute('INSERT INTO changes (idea_id) SELECT id FROM ideas ORDER BY created_at, id')
+    
     # Check if we need to add initial data
     c.execute('SELECT COUNT(*) as count FROM ideas')
     if c.fetchone()[0] == 0:
@@ -79,93 +532,834 @@ def init_db():
             ('Besserer Lehrbuch-Reader', 'Lern-Apps sind nur Quick-Hacks die nicht funktionieren', 'Echte Lösung zum effektiven Lernen von Lehrbüchern', 'Anki, Quizlet (funktionieren nicht gut)', 'Web Research', 'education'),
             ('Plattform-Übergreifender Musik-Manager', 'Musik ist auf Spotify, Apple Music, YouTube verteilt', 'Eine App die alle Musik-Dienste zentral verwaltet', 'Soundiiz, TunemyMusic', 'Web Research', 'productivity'),
         ]
-        c.executemany('INSERT INTO ideas (title, problem, description, existing_solutions, source, category) VALUES (?, ?, ?, ?, ?, ?)', initial_ideas)
+        _ingest(conn, [dict(zip(IDEA_FIELDS, idea)) for idea in initial_ideas], 'flag')
+
+def _table_exists(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+def _rebuild_counts(conn):
+    conn.execute('DELETE FROM facet_counts')
+    conn.execute('DELETE FROM status_counts')
+    conn.execute('''
+        INSERT INTO facet_counts (status, category, source, count)
+        SELECT COALESCE(status, ''), COALESCE(category, ''), COALESCE(source, ''), COUNT(*) FROM (
+            SELECT status, category, source FROM ideas
+            UNION ALL SELECT status, category, source FROM ideas_archive
+        ) GROUP BY 1, 2, 3
+    ''')
+    conn.execute('INSERT INTO status_counts (status, count) SELECT status, SUM(count) FROM facet_counts GROUP BY status')
+
+def _chunks(items, size=SQL_VARIABLE_CHUNK):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _backfill_fingerprints(conn):
+    """Fingerprint ideas stored before duplicate detection existed
     
-    conn.commit()
-    conn.close()
+    Exact copies of an earlier idea are flagged via duplicate_of; near
+    copies are left alone, only new inserts are checked for those.
+    """
+    seen, updates, flags, lsh_rows = {}, [], [], []
+    for r in conn.execute('SELECT id, title, problem FROM ideas ORDER BY id').fetchall():
+        fp = dedup.fingerprint(r['title'], r['problem'])
+        if fp.content_hash in seen:
+            flags.append((seen[fp.content_hash], r['id']))
+            continue
+        seen[fp.content_hash] = r['id']
+        updates.append((fp.content_hash, fp.signature.tobytes(), r['id']))
+        lsh_rows.extend((bucket, r['id']) for bucket in fp.buckets)
+    conn.executemany('UPDATE ideas SET content_hash = ?, minhash = ? WHERE id = ?', updates)
+    conn.executemany('UPDATE ideas SET duplicate_of = ? WHERE id = ?', flags)
+    conn.executemany('INSERT OR IGNORE INTO idea_lsh (bucket, idea_id) VALUES (?, ?)', lsh_rows)
 
-def add_idea(title, problem, description="", existing_solutions="", source="", category="", research_notes=""):
-    conn = get_db()
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO ideas (title, problem, description, existing_solutions, source, category, research_notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (title, problem, description, existing_solutions, source, category, research_notes))
-    conn.commit()
-    idea_id = c.lastrowid
-    conn.close()
+def _lookup_hashes(conn, hashes, table='ideas'):
+    found = {}
+    for chunk in _chunks(hashes):
+        marks = ','.join('?' * len(chunk))
+        for r in conn.execute(f'SELECT content_hash, id FROM {table} WHERE content_hash IN ({marks})', chunk):
+            found[r[0]] = r[1]
+    return found
+
+def _lookup_buckets(conn, buckets):
+    """Newest LSH_BUCKET_LIMIT idea ids per bucket, oldest first"""
+    found = defaultdict(lambda: deque(maxlen=LSH_BUCKET_LIMIT))
+    # Per bucket: seek to the LSH_BUCKET_LIMIT-th newest id, then read the range above it
+    for r in conn.execute('''
+        SELECT buckets.value, idea_lsh.idea_id FROM json_each(?) AS buckets
+        JOIN idea_lsh ON idea_lsh.bucket = buckets.value AND idea_lsh.idea_id >= COALESCE((
+            SELECT idea_id FROM idea_lsh WHERE bucket = buckets.value
+            ORDER BY idea_id DESC LIMIT 1 OFFSET ?
+        ), 0)
+        ORDER BY idea_lsh.bucket, idea_lsh.idea_id
+    ''', (json.dumps(list(buckets)), LSH_BUCKET_LIMIT - 1)):
+        found[r[0]].append(r[1])
+    return found
+
+def _lookup_signatures(conn, idea_ids):
+    found = {}
+    for chunk in _chunks(idea_ids):
+        marks = ','.join('?' * len(chunk))
+        for r in conn.execute(f'SELECT id, minhash FROM ideas WHERE id IN ({marks}) AND minhash IS NOT NULL', chunk):
+            found[r[0]] = dedup.pack(r[1])
+    return found
+
+def _best_match(fp, bucket_ids, signatures):
+    """Most similar known idea sharing an LSH bucket, if similar enough"""
+    shared = Counter()
+    for bucket in fp.buckets:
+        shared.update(bucket_ids.get(bucket, ()))
+    best, best_score = None, dedup.NEAR_DUPLICATE_THRESHOLD
+    packed = dedup.pack(fp.signature)
+    for idea_id in sorted(idea_id for idea_id, _ in shared.most_common(LSH_MAX_COMPARISONS)):
+        signature = signatures.get(idea_id)
+        if signature is None:
+            continue
+        score = dedup.packed_similarity(packed, signature)
+        if score >= best_score and (best is None or score > best_score):
+            best, best_score = idea_id, score
+    return best
+
+def _next_idea_id(conn):
+    row = conn.execute('''
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'ideas'), 0),
+                   COALESCE((SELECT MAX(id) FROM ideas), 0),
+                   COALESCE((SELECT MAX(id) FROM ideas_archive), 0))
+    ''').fetchone()
+    return row[0] + 1
+
+def _ingest(conn, records, on_duplicate, near=True):
+    """Insert idea dicts within the caller's transaction, resolving duplicates
+    
+    Returns one (idea_id, outcome) per record, outcome being 'inserted',
+    'skipped', 'merged' or 'flagged'; for skipped and merged records the id
+    is that of the stored original. Stored ideas are looked up once per
+    batch, duplicates within the batch are caught from memory. Archived
+    ideas are only matched exactly and never merged into; a merge with one
+    is reported as skipped. near=False matches exact copies only and stores
+    no MinHash signature; see fingerprint_ideas(). Raises ValueError,
+    before anything is written, if a record lacks a title or problem.
+    """
+    if on_duplicate not in DUPLICATE_ACTIONS:
+        raise ValueError(f"on_duplicate must be one of {DUPLICATE_ACTIONS}, not {on_duplicate!r}")
+    for record in records:
+        for field in ('title', 'problem'):
+            if not (record.get(field) or '').strip():
+                raise ValueError(f"An idea needs a {field}")
+    
+    if near:
+        prints = [dedup.fingerprint(r['title'], r['problem']) for r in records]
+    else:
+        prints = [dedup.Fingerprint(dedup.content_hash(r['title'], r['problem']), None, ()) for r in records]
+    hashes = {fp.content_hash for fp in prints}
+    archived = _lookup_hashes(conn, hashes, 'ideas_archive')
+    known_hashes = {**archived, **_lookup_hashes(conn, hashes)}
+    archived = set(archived.values())
+    bucket_ids = _lookup_buckets(conn, {bucket for fp in prints for bucket in fp.buckets})
+    signatures = _lookup_signatures(conn, set().union(*bucket_ids.values()))
+    
+    next_id = _next_idea_id(conn)
+    inserts, pending, merges, lsh_rows, results = [], {}, {}, [], []
+    for record, fp in zip(records, prints):
+        original = known_hashes.get(fp.content_hash) or (_best_match(fp, bucket_ids, signatures) if near else None)
+        if original is not None and (on_duplicate == 'skip' or (on_duplicate == 'merge' and original in archived)):
+            results.append((original, 'skipped'))
+            continue
+        if original is not None and on_duplicate == 'merge':
+            # Fill fields the original left blank; the first value wins
+            target = pending.get(original) or merges.setdefault(original, {})
+            for field in MERGE_FIELDS:
+                if not target.get(field) and record.get(field):
+                    target[field] = record[field]
+            results.append((original, 'merged'))
+            continue
+        
+        row = {field: record.get(field) or '' for field in IDEA_FIELDS}
+        row.update(id=next_id, status=record.get('status'), created_at=record.get('created_at'))
+        next_id += 1
+        if original is None:
+            row.update(content_hash=fp.content_hash, minhash=None, duplicate_of=None)
+            known_hashes[fp.content_hash] = row['id']
+            if near:
+                row['minhash'] = fp.signature.tobytes()
+                signatures[row['id']] = dedup.pack(fp.signature)
+            for bucket in fp.buckets:
+                bucket_ids[bucket].append(row['id'])
+                lsh_rows.append((bucket, row['id']))
+            pending[row['id']] = row
+            results.append((row['id'], 'inserted'))
+        else:
+            row.update(content_hash=None, minhash=None, duplicate_of=original)
+            results.append((row['id'], 'flagged'))
+        inserts.append(row)
+    
+    conn.execute("UPDATE meta SET value = 1 WHERE key = 'fts_deferred'")
+    conn.executemany('''
+        INSERT INTO ideas (id, title, problem, description, existing_solutions, source, category,
+                           research_notes, content_hash, minhash, duplicate_of, status, created_at)
+        VALUES (:id, :title, :problem, :description, :existing_solutions, :source, :category,
+                :research_notes, :content_hash, :minhash, :duplicate_of,
+                COALESCE(:status, 'new'), COALESCE(:created_at, CURRENT_TIMESTAMP))
+    ''', inserts)
+    conn.execute("UPDATE meta SET value = 0 WHERE key = 'fts_deferred'")
+    if inserts:
+        conn.execute('''
+            INSERT INTO ideas_fts (rowid, title, problem, description, existing_solutions)
+            SELECT id, title, problem, description, existing_solutions FROM ideas WHERE id BETWEEN ? AND ?
+        ''', (inserts[0]['id'], inserts[-1]['id']))
+    # In key order the bucket index is appended to page by page
+    lsh_rows.sort()
+    conn.executemany('INSERT INTO idea_lsh (bucket, idea_id) VALUES (?, ?)', lsh_rows)
+    if merges:
+        fill = ', '.join(f"{f} = CASE WHEN COALESCE({f}, '') = '' AND :{f} != '' THEN :{f} ELSE {f} END" for f in MERGE_FIELDS)
+        changed = ' OR '.join(f"(COALESCE({f}, '') = '' AND :{f} != '')" for f in MERGE_FIELDS)
+        conn.executemany(
+            f'UPDATE ideas SET {fill}, updated_at = CURRENT_TIMESTAMP WHERE id = :id AND ({changed})',
+            [{'id': idea_id, **{f: values.get(f, '') for f in MERGE_FIELDS}} for idea_id, values in merges.items()]
+        )
+    return results
+
+@instrumented
+def add_idea(title, problem, description="", existing_solutions="", source="", category="", research_notes="", on_duplicate='skip'):
+    """Add an idea; returns its id, or the id of the stored idea it duplicates
+    
+    on_duplicate decides what happens to exact or near duplicates: 'skip'
+    drops the new idea, 'merge' fills blank fields of the original with it
+    and 'flag' stores it with duplicate_of pointing at the original.
+    """
+    record = dict(zip(IDEA_FIELDS, (title, problem, description, existing_solutions, source, category, research_notes)))
+    with transaction() as conn:
+        [(idea_id, outcome)] = _ingest(conn, [record], on_duplicate)
     return idea_id
 
-def get_all_ideas():
+@instrumented
+def add_ideas(records, on_duplicate='skip', near=True):
+    """Add idea dicts in one transaction; returns (idea_id, outcome) per record"""
+    records = list(records)
+    with transaction() as conn:
+        return _ingest(conn, records, on_duplicate, near)
+
+@instrumented
+def add_ideas_bulk(records, batch_size=BULK_BATCH_SIZE, on_duplicate='skip', progress=None, near=True):
+    """Stream idea dicts into the database, one transaction per batch
+    
+    records may be any iterable and is consumed lazily, so only one batch
+    is held in memory. Besides the idea fields a record may carry status and
+    created_at. progress, if given, is called with the running outcome
+    counts after every batch; the final counts are returned.
+    
+    Near-duplicate detection (MinHash and LSH lookups) is most of the cost:
+    about 1-2k ideas/s with it, about 7k ideas/s with near=False, where the
+    indexes, FTS and counter triggers are what is left. Trusted loads can
+    pass near=False to check exact copies only and run fingerprint_ideas()
+    afterwards.
+    """
+    counts = dict.fromkeys(('inserted', 'skipped', 'merged', 'flagged'), 0)
+    batch = []
+    # Each batch outgrows the default WAL size, so every commit would
+    # checkpoint; fewer, larger checkpoints cost less in total.
     conn = get_db()
-    c = conn.cursor()
-    c.execute('SELECT * FROM ideas ORDER BY created_at DESC')
-    rows = c.fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    checkpoint = conn.execute('PRAGMA wal_autocheckpoint').fetchone()[0]
+    conn.execute(f'PRAGMA wal_autocheckpoint = {BULK_WAL_CHECKPOINT}')
+    
+    def flush():
+        with transaction() as conn:
+            for _, outcome in _ingest(conn, batch, on_duplicate, near):
+                counts[outcome] += 1
+        batch.clear()
+        if progress:
+            progress(dict(counts))
+    
+    try:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        conn.execute(f'PRAGMA wal_autocheckpoint = {checkpoint}')
+    return counts
 
+@instrumented
+def fingerprint_ideas(batch_size=BULK_BATCH_SIZE):
+    """Store MinHash signatures for ideas loaded with near=False; returns how many
+
+    Until then near-duplicates of those ideas go unnoticed. Like the
+    backfill in init_db() this only indexes them; near copies already
+    stored are not flagged. Runs one transaction per batch_size ideas.
+    """
+    done, last_id = 0, 0
+    while True:
+        with transaction() as conn:
+            rows = conn.execute('''
+                SELECT id, title, problem FROM ideas
+                WHERE id > ? AND minhash IS NULL AND content_hash IS NOT NULL ORDER BY id LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                return done
+            updates, lsh_rows = [], []
+            for r in rows:
+                fp = dedup.fingerprint(r['title'], r['problem'])
+                updates.append((fp.signature.tobytes(), r['id']))
+                lsh_rows.extend((bucket, r['id']) for bucket in fp.buckets)
+            conn.executemany('UPDATE ideas SET minhash = ? WHERE id = ?', updates)
+            lsh_rows.sort()
+            conn.executemany('INSERT OR IGNORE INTO idea_lsh (bucket, idea_id) VALUES (?, ?)', lsh_rows)
+        done += len(rows)
+        last_id = rows[-1]['id']
+
+@instrumented
+def get_all_ideas():
+    return list(iter_ideas())
+
+@instrumented
 def get_ideas_by_status(status):
+    return list(iter_ideas(status))
+
+def encode_cursor(idea):
+    """Opaque cursor pointing just past the given idea"""
+    raw = f"{idea['created_at']}|{idea['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Turn a cursor back into (created_at, id); raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, idea_id = raw.rsplit('|', 1)
+        return created_at, int(idea_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+@instrumented
+def get_ideas_page(status=None, cursor=None, limit=PAGE_SIZE, category=None, fields=None, source=None):
+    """Return (ideas, next_cursor) for one page of ideas, newest first
+    
+    next_cursor is None on the last page. Pages are addressed by the
+    (created_at, id) of the last row seen, so fetching a page costs the
+    same no matter how deep into the listing it is. fields restricts the
+    selected columns to a subset of PUBLIC_FIELDS; id and created_at are
+    always included since the cursor is built from them. Listings that can
+    contain rejected ideas (no status, or 'reject') include the archived
+    ones, merged in from ideas_archive.
+    """
+    if fields is None:
+        columns = ', '.join(IDEA_COLUMNS)
+    else:
+        unknown = set(fields) - set(PUBLIC_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        columns = ', '.join(dict.fromkeys(('id', 'created_at', *fields)))
+    
+    clauses, params = [], []
+    if status:
+        clauses.append('status = ?')
+        params.append(status)
+    if category:
+        clauses.append('category = ?')
+        params.append(category)
+    if source:
+        clauses.append('source = ?')
+        params.append(source)
+    if cursor:
+        clauses.append('(created_at, id) < (?, ?)')
+        params.extend(decode_cursor(cursor))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    
+    query = f'SELECT {columns} FROM ideas {where} ORDER BY created_at DESC, id DESC LIMIT ?'
+    if status in (None, ARCHIVED_STATUS):
+        # Each side reads at most one page from its own index
+        archive_query = query.replace('FROM ideas ', 'FROM ideas_archive ', 1)
+        query = f'''
+            SELECT * FROM (SELECT * FROM ({query}) UNION ALL SELECT * FROM ({archive_query}))
+            ORDER BY created_at DESC, id DESC LIMIT ?
+        '''
+        params = [*params, limit + 1, *params, limit + 1]
+    rows = get_db().execute(query, (*params, limit + 1)).fetchall()
+    ideas = [dict(r) for r in rows[:limit]]
+    next_cursor = encode_cursor(ideas[-1]) if len(rows) > limit else None
+    return ideas, next_cursor
+
+def iter_ideas(status=None, category=None, fields=None, cursor=None, batch_size=EXPORT_BATCH_SIZE, source=None):
+    """Yield all matching ideas newest first, fetched one keyset page at a time"""
+    while True:
+        ideas, cursor = get_ideas_page(status, cursor, batch_size, category, fields, source)
+        yield from ideas
+        if cursor is None:
+            return
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query where every word must match as a prefix"""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+@instrumented
+def search_ideas(text, limit=PAGE_SIZE, include_archived=False):
+    """Full-text search over ideas; returns (ideas, partial)
+    
+    Only the SEARCH_WINDOW newest matches are ranked by bm25, so a term
+    that occurs in half the corpus costs no more than a rare one. partial
+    is True when there were more matches than that: older matches were not
+    considered, and the page says so. Archived ideas are left out unless
+    include_archived is set; their newest matches are then ranked in with
+    the others, each from its own index. Each result carries a 'snippet'
+    with the matched words wrapped in SNIPPET_START / SNIPPET_END.
+    """
+    match = build_match_query(text)
+    if not match:
+        return [], False
     conn = get_db()
-    c = conn.cursor()
-    c.execute('SELECT * FROM ideas WHERE status = ? ORDER BY created_at DESC', (status,))
-    rows = c.fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    params = {"match": match, "window": SEARCH_WINDOW, "limit": limit,
+              "start": SNIPPET_START, "end": SNIPPET_END}
+    tables = ('ideas', 'ideas_archive') if include_archived else ('ideas',)
+    partial = any(conn.execute(f'''
+        SELECT COUNT(*) > :window FROM (
+            SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH :match
+            ORDER BY rowid DESC LIMIT :window + 1
+        )
+    ''', params).fetchone()[0] for table in tables)
+    columns = ', '.join(IDEA_COLUMNS)
+    hits = ' UNION ALL '.join(f'''
+        SELECT * FROM (
+            SELECT {', '.join(f'{table}.{column}' for column in IDEA_COLUMNS)}, hits.rank, hits.snippet FROM (
+                SELECT rowid, rank, snippet({table}_fts, -1, :start, :end, '…', 12) AS snippet
+                FROM {table}_fts WHERE {table}_fts MATCH :match
+                ORDER BY rowid DESC LIMIT :window
+            ) AS hits
+            JOIN {table} ON {table}.id = hits.rowid
+        )
+    ''' for table in tables)
+    rows = conn.execute(f'SELECT {columns}, snippet FROM ({hits}) ORDER BY rank LIMIT :limit', params).fetchall()
+    return [dict(r) for r in rows], partial
 
+@instrumented
 def update_idea_status(idea_id, status):
+    with transaction() as conn:
+        if status != ARCHIVED_STATUS:
+            _unarchive(conn, [idea_id])
+        conn.execute('UPDATE ideas SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?', (status, idea_id))
+
+def _stats_key(status):
+    """get_stats() names the 'reject' status 'rejected'"""
+    return 'rejected' if status == 'reject' else status
+
+@instrumented
+def update_ideas_status(idea_ids, status):
+    """Set the status of many ideas in one transaction
+
+    Ideas that already have the status are left untouched. Returns
+    (changed ids, delta) where delta maps get_stats() keys to the change
+    in their counts, e.g. {'new': -2, 'rejected': 2}.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    idea_ids = list(dict.fromkeys(idea_ids))
+    changed, delta = [], {}
+    with transaction() as conn:
+        if status != ARCHIVED_STATUS:
+            _unarchive(conn, idea_ids)
+        for chunk in _chunks(idea_ids):
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f'SELECT id, status FROM ideas WHERE id IN ({placeholders}) AND status IS NOT ?',
+                (*chunk, status)
+            ).fetchall()
+            if not rows:
+                continue
+            conn.execute(
+                f'UPDATE ideas SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id IN ({",".join("?" * len(rows))})',
+                (status, *(row['id'] for row in rows))
+            )
+            for row in rows:
+                changed.append(row['id'])
+                old = _stats_key(row['status'])
+                delta[old] = delta.get(old, 0) - 1
+            delta[_stats_key(status)] = delta.get(_stats_key(status), 0) + len(rows)
+    return changed, {key: value for key, value in delta.items() if key and value}
+
+@instrumented
+def get_ideas_by_ids(idea_ids):
+    """Ideas with the given ids, in the order asked for; unknown ids are skipped
+
+    Ids not found in ideas are looked up in ideas_archive.
+    """
+    ideas = {}
     conn = get_db()
-    c = conn.cursor()
-    c.execute('UPDATE ideas SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?', (status, idea_id))
-    conn.commit()
-    conn.close()
+    columns = ', '.join(IDEA_COLUMNS)
+    for table in ('ideas', 'ideas_archive'):
+        for chunk in _chunks(idea_id for idea_id in dict.fromkeys(idea_ids) if idea_id not in ideas):
+            rows = conn.execute(f'SELECT {columns} FROM {table} WHERE id IN ({",".join("?" * len(chunk))})', chunk).fetchall()
+            ideas.update((row['id'], dict(row)) for row in rows)
+    return [ideas[idea_id] for idea_id in dict.fromkeys(idea_ids) if idea_id in ideas]
+
+def _unarchive(conn, idea_ids):
+    """Move archived ideas back into ideas within the caller's transaction
+
+    Called before a status change, so an archived idea that is picked up
+    again becomes hot. Its change feed entry is rewritten by the insert.
+    """
+    columns = ', '.join(IDEA_COLUMNS)
+    for chunk in _chunks(idea_ids):
+        marks = ','.join('?' * len(chunk))
+        rows = conn.execute(f'SELECT id, minhash FROM ideas_archive WHERE id IN ({marks})', chunk).fetchall()
+        if not rows:
+            continue
+        ids = [row['id'] for row in rows]
+        marks = ','.join('?' * len(ids))
+        conn.execute(f'DELETE FROM changes WHERE idea_id IN ({marks})', ids)
+        conn.execute(f'INSERT INTO ideas ({columns}) SELECT {columns} FROM ideas_archive WHERE id IN ({marks})', ids)
+        conn.execute(f'DELETE FROM ideas_archive WHERE id IN ({marks})', ids)
+        conn.executemany('INSERT OR IGNORE INTO idea_lsh (bucket, idea_id) VALUES (?, ?)', [
+            (bucket, row['id']) for row in rows if row['minhash'] is not None
+            for bucket in dedup.band_buckets(dedup.signature_from_bytes(row['minhash']))
+        ])
+
+@instrumented
+def archive_rejected(days=ARCHIVE_AFTER_DAYS):
+    """Move ideas rejected more than days ago into ideas_archive; returns how many
+
+    Runs one short transaction per SQL_VARIABLE_CHUNK ideas so writers are
+    not held up. Counts, listings and the change feed stay the same;
+    near-duplicate detection stops seeing archived ideas, and search only
+    finds them with include_archived.
+    """
+    ids = [r[0] for r in get_db().execute(
+        'SELECT id FROM ideas WHERE status = ? AND updated_at < datetime(\'now\', ?)',
+        (ARCHIVED_STATUS, f'-{days} days'))]
+    columns = ', '.join(IDEA_COLUMNS)
+    moved = 0
+    for chunk in _chunks(ids):
+        marks = ','.join('?' * len(chunk))
+        with transaction() as conn:
+            conn.execute(f'INSERT INTO ideas_archive ({columns}) SELECT {columns} FROM ideas '
+                         f'WHERE id IN ({marks}) AND status = ?', (*chunk, ARCHIVED_STATUS))
+            moved += conn.execute(f'DELETE FROM ideas WHERE id IN ({marks}) AND status = ?',
+                                  (*chunk, ARCHIVED_STATUS)).rowcount
+    return moved
 
+def _inflate(findings):
+    """Research log findings as text, whether stored compressed or not"""
+    return zlib.decompress(findings).decode() if isinstance(findings, bytes) else findings
+
+@instrumented
+def compress_research_log(days=RESEARCH_COMPRESS_DAYS, min_bytes=RESEARCH_COMPRESS_MIN_BYTES):
+    """zlib-compress findings older than days; returns (rows compressed, bytes saved)"""
+    rows = get_db().execute('''
+        SELECT id, findings FROM research_log
+        WHERE typeof(findings) = 'text' AND length(findings) >= ? AND researched_at < datetime('now', ?)
+    ''', (min_bytes, f'-{days} days')).fetchall()
+    updates, saved = [], 0
+    for row in rows:
+        text = row['findings'].encode()
+        packed = zlib.compress(text, 9)
+        if len(packed) < len(text):
+            updates.append((packed, row['id']))
+            saved += len(text) - len(packed)
+    for chunk in _chunks(updates):
+        with transaction() as conn:
+            conn.executemany('UPDATE research_log SET findings = ? WHERE id = ?', chunk)
+    return len(updates), saved
+
+@instrumented
 def log_research(search_term, source, findings):
-    conn = get_db()
-    c = conn.cursor()
-    c.execute('INSERT INTO research_log (search_term, source, findings) VALUES (?, ?, ?)', 
-              (search_term, source, findings))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute('INSERT INTO research_log (search_term, source, findings) VALUES (?, ?, ?)',
+                     (search_term, source, findings))
 
+@instrumented
 def get_research_log():
-    conn = get_db()
-    c = conn.cursor()
-    c.execute('SELECT * FROM research_log ORDER BY researched_at DESC LIMIT 20')
-    rows = c.fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    rows = get_db().execute('SELECT * FROM research_log ORDER BY researched_at DESC LIMIT 20').fetchall()
+    return [dict(r, findings=_inflate(r['findings'])) for r in rows]
+
+def _research_cache_key(backend, query):
+    return hashlib.sha1(f"{backend}\n{query}".encode()).hexdigest()
+
+@instrumented
+def get_cached_research(backend, query, ttl=RESEARCH_CACHE_TTL):
+    """Return the cached result of a normalized query if younger than ttl, else None"""
+    now = time.time()
+    with transaction() as conn:
+        row = conn.execute('SELECT payload FROM research_cache WHERE key = ? AND created_at > ?',
+                           (_research_cache_key(backend, query), now - ttl)).fetchone()
+        if row is None:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'research_cache_misses'")
+            return None
+        conn.execute('UPDATE research_cache SET accessed_at = ? WHERE key = ?', (now, _research_cache_key(backend, query)))
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'research_cache_hits'")
+    return json.loads(zlib.decompress(row['payload']))
+
+@instrumented
+def cache_research(backend, query, result, ttl=RESEARCH_CACHE_TTL, max_bytes=RESEARCH_CACHE_MAX_BYTES):
+    """Store a search result, dropping expired and least recently used entries"""
+    payload = zlib.compress(json.dumps(result, ensure_ascii=False).encode(), 6)
+    now = time.time()
+    with transaction() as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO research_cache (key, backend, query, payload, size, created_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (_research_cache_key(backend, query), backend, query, payload, len(payload), now, now))
+        conn.execute('DELETE FROM research_cache WHERE created_at <= ?', (now - ttl,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM research_cache').fetchone()[0]
+        if total > max_bytes:
+            # Walk from the least recently used entry until enough is freed
+            doomed, freed = [], 0
+            for r in conn.execute('SELECT key, size FROM research_cache ORDER BY accessed_at'):
+                if total - freed <= max_bytes:
+                    break
+                doomed.append((r['key'],))
+                freed += r['size']
+            conn.executemany('DELETE FROM research_cache WHERE key = ?', doomed)
 
+@instrumented
+def get_research_cache_stats():
+    row = get_db().execute('SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS bytes FROM research_cache').fetchone()
+    counters = dict(get_db().execute(
+        "SELECT key, value FROM meta WHERE key IN ('research_cache_hits', 'research_cache_misses')").fetchall())
+    return {
+        "entries": row['entries'],
+        "bytes": row['bytes'],
+        "hits": counters.get('research_cache_hits', 0),
+        "misses": counters.get('research_cache_misses', 0),
+    }
+
+def clear_research_cache():
+    with transaction() as conn:
+        conn.execute('DELETE FROM research_cache')
+
+@instrumented
 def get_categories():
-    conn = get_db()
-    c = conn.cursor()
-    c.execute('SELECT DISTINCT category FROM ideas WHERE category != ""')
-    rows = c.fetchall()
-    conn.close()
-    return [r['category'] for r in rows if r['category']]
+    rows = get_db().execute('''
+        SELECT category FROM facet_counts WHERE category != ''
+        GROUP BY category HAVING SUM(count) > 0 ORDER BY category
+    ''').fetchall()
+    return [r['category'] for r in rows]
+
+FACETS = ('status', 'category', 'source')
+_facet_cache = {'version': None, 'rows': ()}
+_facet_lock = threading.Lock()
 
+def _facet_rows():
+    """Non-empty (status, category, source, count) counters, read once per data version"""
+    version, _ = get_data_version()
+    with _facet_lock:
+        if _facet_cache['version'] == version:
+            return _facet_cache['rows']
+    rows = tuple(tuple(r) for r in get_db().execute(
+        'SELECT status, category, source, count FROM facet_counts WHERE count > 0'))
+    with _facet_lock:
+        _facet_cache.update(version=version, rows=rows)
+    return rows
+
+@instrumented
+def get_facets(status=None, category=None, source=None):
+    """Return {facet: {value: count}} for status, category and source
+    
+    Each facet is counted under the other two filters, so the numbers say
+    how many ideas a click on that value would list. Empty values are
+    left out.
+    """
+    selected = {'status': status, 'category': category, 'source': source}
+    facets = {name: {} for name in FACETS}
+    for row in _facet_rows():
+        values, count = dict(zip(FACETS, row)), row[3]
+        for name in FACETS:
+            if values[name] and all(not selected[other] or values[other] == selected[other]
+                                    for other in FACETS if other != name):
+                facets[name][values[name]] = facets[name].get(values[name], 0) + count
+    return facets
+
+@instrumented
 def get_stats():
-    conn = get_db()
-    c = conn.cursor()
+    rows = get_db().execute('SELECT status, count FROM status_counts').fetchall()
+    counts = {r['status']: r['count'] for r in rows}
     
-    c.execute('SELECT COUNT(*) as total FROM ideas')
-    total = c.fetchone()['total']
+    return {
+        "total": sum(counts.values()),
+        "new": counts.get('new', 0),
+        "interesting": counts.get('interesting', 0),
+        "rejected": counts.get('reject', 0),
+        "validated": counts.get('validated', 0),
+    }
+
+@instrumented
+def get_data_version():
+    """Return (version, changed_at) of the ideas table; version grows on every write"""
+    row = get_db().execute("SELECT value, updated_at FROM meta WHERE key = 'ideas_version'").fetchone()
+    return row['value'], row['updated_at']
+
+@instrumented
+def get_category_stats():
+    """Return {category: {status: count}} from the materialized counters"""
+    stats = {}
+    for r in get_db().execute('''
+        SELECT category, status, SUM(count) AS count FROM facet_counts
+        GROUP BY category, status HAVING SUM(count) > 0
+    '''):
+        stats.setdefault(r['category'], {})[r['status']] = r['count']
+    return stats
+
+@instrumented
+def check_stats():
+    """Compare the counters with a full recount; returns the mismatching rows
     
-    c.execute("SELECT COUNT(*) as count FROM ideas WHERE status = 'new'")
-    new_count = c.fetchone()['count']
+    Each row names its counter table; status_counts rows leave category and
+    source empty.
+    """
+    conn = get_db()
+    expected = {(r[0], r[1], r[2]): r[3] for r in conn.execute('''
+        SELECT COALESCE(status, ''), COALESCE(category, ''), COALESCE(source, ''), COUNT(*) FROM (
+            SELECT status, category, source FROM ideas
+            UNION ALL SELECT status, category, source FROM ideas_archive
+        ) GROUP BY 1, 2, 3
+    ''')}
+    expected_status = Counter()
+    for (status, _, _), count in expected.items():
+        expected_status[status, '', ''] += count
+    tables = (
+        ('facet_counts', expected, {(r[0], r[1], r[2]): r[3] for r in conn.execute(
+            'SELECT status, category, source, count FROM facet_counts WHERE count != 0')}),
+        ('status_counts', expected_status, {(r[0], '', ''): r[1] for r in conn.execute(
+            'SELECT status, count FROM status_counts WHERE count != 0')}),
+    )
+    mismatches = []
+    for table, expected_counts, actual_counts in tables:
+        for status, category, source in sorted(expected_counts.keys() | actual_counts.keys()):
+            want = expected_counts.get((status, category, source), 0)
+            have = actual_counts.get((status, category, source), 0)
+            if want != have:
+                mismatches.append({"table": table, "status": status, "category": category,
+                                   "source": source, "expected": want, "actual": have})
+    return mismatches
+
+@instrumented
+def rebuild_stats():
+    """Recompute the counters from the ideas and ideas_archive tables"""
+    with transaction() as conn:
+        _rebuild_counts(conn)
+
+@instrumented
+def get_changes(since=0, limit=PAGE_SIZE, fields=None):
+    """Return (changes, next_since, more) for ideas changed after sequence number since
     
-    c.execute("SELECT COUNT(*) as count FROM ideas WHERE status = 'interesting'")
-    interesting = c.fetchone()['count']
+    Each change is {'seq', 'id', 'idea': {...}} with the idea's current
+    fields, or {'seq', 'id', 'deleted': True}. Pass next_since back to get
+    the following changes; more says whether there are any yet. since=0
+    yields every stored idea, a full sync. Raises ChangesCompacted if
+    deletions after since may already have been compacted away.
+    """
+    fields = PUBLIC_FIELDS if fields is None else tuple(fields)
+    unknown = set(fields) - set(PUBLIC_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    # An idea lives in exactly one of the two tables
+    columns = ', '.join(f'COALESCE(ideas.{field}, archived.{field}) AS {field}' for field in fields)
     
-    c.execute("SELECT COUNT(*) as count FROM ideas WHERE status = 'reject'")
-    rejected = c.fetchone()['count']
+    conn = get_db()
+    rows = conn.execute(f'''
+        SELECT changes.seq AS _seq, changes.idea_id AS _idea_id,
+               ideas.id IS NULL AND archived.id IS NULL AS _deleted, {columns}
+        FROM changes LEFT JOIN ideas ON ideas.id = changes.idea_id
+        LEFT JOIN ideas_archive AS archived ON archived.id = changes.idea_id
+        WHERE changes.seq > ? ORDER BY changes.seq LIMIT ?
+    ''', (since, limit + 1)).fetchall()
+    # Checked after reading: a compaction that ran before the read is seen here
+    min_seq = conn.execute("SELECT value FROM meta WHERE key = 'changes_min_seq'").fetchone()[0]
+    if 0 < since < min_seq:
+        raise ChangesCompacted(since, min_seq)
     
-    c.execute('SELECT COUNT(*) as count FROM ideas WHERE status = "validated"')
-    validated = c.fetchone()['count']
+    changes = []
+    for row in rows[:limit]:
+        change = {'seq': row['_seq'], 'id': row['_idea_id']}
+        if row['_deleted']:
+            change['deleted'] = True
+        else:
+            change['idea'] = {field: row[field] for field in fields}
+        changes.append(change)
+    next_since = changes[-1]['seq'] if changes else since
+    return changes, next_since, len(rows) > limit
+
+@instrumented
+def get_changes_min_seq():
+    """Lowest since the change feed still serves (apart from 0, a full sync)"""
+    return get_db().execute("SELECT value FROM meta WHERE key = 'changes_min_seq'").fetchone()[0]
+
+@instrumented
+def compact_changes(retention_days=CHANGES_RETENTION_DAYS):
+    """Drop tombstones of ideas deleted more than retention_days ago; returns how many"""
+    with transaction() as conn:
+        row = conn.execute('''
+            SELECT COUNT(*), MAX(seq) FROM changes
+            WHERE changed_at < datetime('now', ?)
+              AND NOT EXISTS (SELECT 1 FROM ideas WHERE ideas.id = changes.idea_id)
+              AND NOT EXISTS (SELECT 1 FROM ideas_archive WHERE ideas_archive.id = changes.idea_id)
+        ''', (f'-{retention_days} days',)).fetchone()
+        removed, last_seq = row[0], row[1]
+        if not removed:
+            return 0
+        conn.execute('''
+            DELETE FROM changes WHERE seq <= ?
+              AND NOT EXISTS (SELECT 1 FROM ideas WHERE ideas.id = changes.idea_id)
+              AND NOT EXISTS (SELECT 1 FROM ideas_archive WHERE ideas_archive.id = changes.idea_id)
+        ''', (last_seq,))
+        conn.execute("UPDATE meta SET value = MAX(value, ?) WHERE key = 'changes_min_seq'", (last_seq,))
+        # Cached /api/changes pages and their ETags are keyed on the version
+        conn.execute("UPDATE meta SET value = value + 1, updated_at = CURRENT_TIMESTAMP WHERE key = 'ideas_version'")
+    return removed
+
+def main(argv=None):
+    import argparse
     
-    conn.close()
+    parser = argparse.ArgumentParser(description="Idea Tracker database maintenance")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("init", help="create tables and seed initial ideas (default)")
+    check = commands.add_parser("check-stats", help="verify the materialized stats counters")
+    check.add_argument("--fix", action="store_true", help="rebuild the counters if they are off")
+    commands.add_parser("rebuild-stats", help="recompute the stats counters from scratch")
+    commands.add_parser("fingerprint", help="index ideas imported without near-duplicate detection")
+    cache = commands.add_parser("research-cache", help="show research cache usage")
+    cache.add_argument("--clear", action="store_true", help="drop all cached search results")
+    compact = commands.add_parser("compact-changes", help="drop old deletions from the change feed")
+    compact.add_argument("--days", type=int, default=CHANGES_RETENTION_DAYS,
+                         help=f"keep deletions this many days (default: {CHANGES_RETENTION_DAYS})")
+    archive = commands.add_parser("archive", help="move old rejected ideas to the archive, compress old research log entries")
+    archive.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                         help=f"archive ideas rejected longer ago than this (default: {ARCHIVE_AFTER_DAYS})")
+    archive.add_argument("--research-days", type=int, default=RESEARCH_COMPRESS_DAYS,
+                         help=f"compress research log entries older than this (default: {RESEARCH_COMPRESS_DAYS})")
+    args = parser.parse_args(argv)
     
-    return {"total": total, "new": new_count, "interesting": interesting, "rejected": rejected, "validated": validated}
+    init_db()
+    if args.command == "check-stats":
+        mismatches = check_stats()
+        for m in mismatches:
+            print(f"{m['table']}: {m['status'] or '-'} / {m['category'] or '-'} / {m['source'] or '-'}: expected {m['expected']}, counted {m['actual']}")
+        if not mismatches:
+            print("Stats counters are consistent")
+        elif args.fix:
+            rebuild_stats()
+            print("Stats counters rebuilt")
+        else:
+            return 1
+    elif args.command == "rebuild-stats":
+        rebuild_stats()
+        print("Stats counters rebuilt")
+    elif args.command == "fingerprint":
+        print(f"{fingerprint_ideas()} ideas fingerprinted for near-duplicate detection")
+    elif args.command == "research-cache":
+        if args.clear:
+            clear_research_cache()
+        stats = get_research_cache_stats()
+        print(f"{stats['entries']} cached searches, {stats['bytes']} bytes; {stats['hits']} hits, {stats['misses']} misses")
+    elif args.command == "compact-changes":
+        removed = compact_changes(args.days)
+        print(f"{removed} deletions compacted; the change feed now starts after {get_changes_min_seq()}")
+    elif args.command == "archive":
+        moved = archive_rejected(args.days)
+        compressed, saved = compress_research_log(args.research_days)
+        print(f"{moved} rejected ideas archived; {compressed} research log entries compressed, {saved} bytes saved")
+    else:
+        print("Database initialized!")
+    return 0
 
 if __name__ == "__main__":
-    init_db()
-    print("Database initialized!")
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Idea Tracker - Duplicate Detection
+Content fingerprints for spotting exact and near-duplicate ideas
+"""
+
+import re
+import hashlib
+import unicodedata
+import zlib
+from array import array
+from collections import namedtuple
+
+SHINGLE_SIZE = 4      # bytes per shingle
+NUM_BINS = 64         # MinHash signature length
+BANDS = 16            # LSH bands; NUM_BINS / BANDS rows per band
+ROWS_PER_BAND = NUM_BINS // BANDS
+NEAR_DUPLICATE_THRESHOLD = 0.5  # estimated Jaccard similarity of the shingle sets
+
+_EMPTY = 0xFFFFFFFF
+_DENSIFY_STEP = 0x9E3779B1  # keeps borrowed values distinct from the source bin
+_LANE_LOW_BITS = int.from_bytes(b'\x01\x00\x00\x00' * NUM_BINS, 'little')
+
+Fingerprint = namedtuple('Fingerprint', 'content_hash signature buckets')
+
+def normalize(text):
+    """Casefold, unify unicode forms and collapse everything but word characters"""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ' '.join(re.findall(r'\w+', text))
+
+def content_hash(title, problem):
+    """Hash that is equal for ideas differing only in case, spacing or punctuation"""
+    return hashlib.sha1(f"{normalize(title)}\n{normalize(problem)}".encode()).hexdigest()
+
+def shingles(text):
+    """Set of overlapping byte n-grams of already normalized text"""
+    data = text.encode()
+    if len(data) <= SHINGLE_SIZE:
+        return {data}
+    return {data[i:i + SHINGLE_SIZE] for i in range(len(data) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set):
+    """One-permutation MinHash signature of a shingle set
+
+    Every shingle is hashed once; the low bits pick one of NUM_BINS bins and
+    each bin keeps the smallest remaining value. Empty bins borrow from the
+    next filled bin (rotation densification) so short texts still compare.
+    """
+    # Walking the hashes from largest to smallest leaves each bin holding
+    # its minimum without a comparison per shingle.
+    mins = {h % NUM_BINS: h // NUM_BINS for h in sorted(map(zlib.crc32, shingle_set), reverse=True)}
+    if len(mins) == NUM_BINS or not mins:
+        return array('I', [mins.get(i, _EMPTY) for i in range(NUM_BINS)])
+
+    bins = []
+    for i in range(NUM_BINS):
+        offset = 0
+        while (i + offset) % NUM_BINS not in mins:
+            offset += 1
+        bins.append((mins[(i + offset) % NUM_BINS] + offset * _DENSIFY_STEP) & 0xFFFFFFFF)
+    return array('I', bins)
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return packed_similarity(pack(signature_a), pack(signature_b))
+
+def pack(signature):
+    """A signature (array or its stored bytes) as one integer, for cheap repeated comparisons"""
+    return int.from_bytes(signature if isinstance(signature, bytes) else signature.tobytes(), 'little')
+
+def packed_similarity(packed_a, packed_b):
+    """similarity() of two pack()ed signatures: the share of equal 32-bit lanes"""
+    diff = packed_a ^ packed_b
+    # OR every lane's bits down onto its lowest bit, set iff the lane differs
+    diff |= diff >> 16
+    diff |= diff >> 8
+    diff |= diff >> 4
+    diff |= diff >> 2
+    diff |= diff >> 1
+    return (NUM_BINS - (diff & _LANE_LOW_BITS).bit_count()) / NUM_BINS
+
+def band_buckets(signature):
+    """LSH bucket keys, one per band; similar signatures share at least one"""
+    data = signature.tobytes()
+    width = ROWS_PER_BAND * signature.itemsize
+    return [(band << 32) | zlib.crc32(data[band * width:(band + 1) * width]) for band in range(BANDS)]
+
+def fingerprint(title, problem):
+    """Everything needed to store and look up an idea for deduplication"""
+    title, problem = normalize(title), normalize(problem)
+    signature = minhash(shingles(f"{title} {problem}"))
+    digest = hashlib.sha1(f"{title}\n{problem}".encode()).hexdigest()
+    return Fingerprint(digest, signature, band_buckets(signature))
+
+def signature_from_bytes(data):
+    signature = array('I')
+    signature.frombytes(data)
+    return signature
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Idea Tracker - Static Export
+Writes the Netlify publish directory from ideas.db
+
+    python export.py [--output public] [--page-size 50]
+
+Layout of the output directory:
+    index.html                    the static app (loads the shards below)
+    data/manifest.json            version, stats and page counts per listing
+    data/<listing>/<page>.json    ideas as compact rows, newest first
+    pages/<listing>/<page>.html   the same pages pre-rendered, no JavaScript needed
+
+<listing> is "all" or one of the statuses.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime, timezone
+from html import escape
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database
+from database import STATUSES, PAGE_SIZE, init_db, iter_ideas, get_stats, get_data_version
+
+ROOT = Path(__file__).parent
+DEFAULT_OUTPUT = ROOT / "public"
+STATIC_FILES = ("index.html", "_redirects")
+
+# Columns shipped to the browser; research notes and fingerprints stay home
+EXPORT_FIELDS = ('id', 'title', 'problem', 'description', 'existing_solutions', 'source',
+                 'category', 'status', 'created_at', 'duplicate_of')
+LISTINGS = ('all', *STATUSES)
+STATS_KEYS = {'all': 'total', 'new': 'new', 'interesting': 'interesting', 'validated': 'validated', 'reject': 'rejected'}
+LISTING_LABELS = {'all': 'Alle', 'new': 'Neu', 'interesting': 'Interessant', 'validated': 'Validiert', 'reject': 'Verworfen'}
+
+def paginate(ideas, page_size):
+    page = []
+    for idea in ideas:
+        page.append(idea)
+        if len(page) == page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+def write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+def page_style():
+    """The <style> block of index.html, so pre-rendered pages look the same"""
+    match = re.search(r'<style>.*?</style>', (ROOT / "index.html").read_text(), re.S)
+    return match.group(0) if match else ''
+
+def render_card(idea):
+    """Read-only idea card; the status is shown, not editable"""
+    description = f'<p class="description">{escape(idea["description"])}</p>' if idea['description'] else ''
+    solutions = f'<p class="solutions">⬡ {escape(idea["existing_solutions"])}</p>' if idea['existing_solutions'] else ''
+    source = f'<span>📌 {escape(idea["source"])}</span>' if idea['source'] else ''
+    category = f'<span class="tag">{escape(idea["category"])}</span>' if idea['category'] else ''
+    status = idea['status'] or 'new'
+    return f"""
+            <div class="idea">
+                <h3>{escape(idea['title'])}</h3>
+                <p class="problem">Problem: {escape(idea['problem'])}</p>
+                {description}{solutions}
+                <div class="meta">
+                    <span>📅 {escape(idea['created_at'] or '')}</span>
+                    {source}{category}
+                </div>
+                <div class="status-bar">
+                    <span class="status-label">Status:</span>
+                    <span class="status-btn status-{status} active">{LISTING_LABELS.get(status, escape(status))}</span>
+                </div>
+            </div>"""
+
+def render_page(style, listing, page, pages, ideas, stats):
+    """One pre-rendered page of a listing; links are relative to pages/<listing>/"""
+    filters = ''.join(
+        f'<a href="../{name}/1.html" class="filter{" active" if name == listing else ""}">{label}</a>'
+        for name, label in LISTING_LABELS.items()
+    )
+    pager = []
+    if page > 1:
+        pager.append(f'<a href="{page - 1}.html" class="filter">← Zurück</a>')
+    if page < pages:
+        pager.append(f'<a href="{page + 1}.html" class="filter">Weiter →</a>')
+    cards = ''.join(render_card(idea) for idea in ideas) or \
+        '<p style="text-align:center;color:#666;padding:40px;">Noch keine Ideen vorhanden</p>'
+    return f"""<!DOCTYPE html>
+<html lang="de">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Idea Tracker - {LISTING_LABELS[listing]} ({page}/{pages})</title>
+    {style}
+</head>
+<body>
+    <div class="container">
+        <div class="header-row">
+            <h1>💡 Idea Tracker</h1>
+            <a class="filter" href="../../index.html">Zur App</a>
+        </div>
+        <div class="stats">
+            <div class="stat"><strong>{stats['total']}</strong><span>Total</span></div>
+            <div class="stat"><strong>{stats['new']}</strong><span>Neu</span></div>
+            <div class="stat"><strong>{stats['interesting']}</strong><span>Interessant</span></div>
+            <div class="stat"><strong>{stats['validated']}</strong><span>Validiert</span></div>
+            <div class="stat"><strong>{stats['rejected']}</strong><span>Verworfen</span></div>
+        </div>
+        <div class="filters">{filters}</div>
+        <div class="ideas">{cards}
+        </div>
+        <div class="filters" style="margin-top: 20px;">{''.join(pager)}</div>
+    </div>
+</body>
+</html>
+"""
+
+def export_listing(target, listing, page_size, style, stats):
+    """Write the JSON shards and HTML pages of one listing; returns its page and idea counts"""
+    status = None if listing == 'all' else listing
+    pages = max(1, -(-stats[STATS_KEYS[listing]] // page_size))
+    count = 0
+    page = 0
+    for page, ideas in enumerate(paginate(iter_ideas(status, fields=EXPORT_FIELDS), page_size), 1):
+        count += len(ideas)
+        write_json(target / "data" / listing / f"{page}.json", {
+            "listing": listing,
+            "page": page,
+            "rows": [[idea[field] for field in EXPORT_FIELDS] for idea in ideas],
+        })
+        html = render_page(style, listing, page, pages, ideas, stats)
+        (target / "pages" / listing).mkdir(parents=True, exist_ok=True)
+        (target / "pages" / listing / f"{page}.html").write_text(html)
+    if page == 0:
+        (target / "pages" / listing).mkdir(parents=True, exist_ok=True)
+        (target / "pages" / listing / "1.html").write_text(render_page(style, listing, 1, 1, [], stats))
+    return {"pages": page, "ideas": count}
+
+def export(output=DEFAULT_OUTPUT, page_size=PAGE_SIZE):
+    """Build the publish directory next to output and swap it in; returns the manifest
+
+    An existing output directory is only replaced if it was written by a
+    previous export (it has data/manifest.json), so a mistyped --output
+    cannot wipe unrelated files.
+    """
+    output = Path(output)
+    if output.exists() and any(output.iterdir()) and not (output / "data" / "manifest.json").exists():
+        raise ValueError(f"{output} is not empty and was not written by export.py")
+
+    init_db()
+    conn = database.get_db()
+    staging = output.with_name(output.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    style = page_style()
+    generated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    # One read transaction, so every shard and the manifest see the same data
+    conn.execute("BEGIN")
+    try:
+        version, changed_at = get_data_version()
+        stats = get_stats()
+        listings = {listing: export_listing(staging, listing, page_size, style, stats)
+                    for listing in LISTINGS}
+    finally:
+        conn.rollback()
+
+    manifest = {
+        "version": version,
+        "changed_at": changed_at,
+        "generated_at": generated_at,
+        "page_size": page_size,
+        "fields": EXPORT_FIELDS,
+        "stats": stats,
+        "listings": listings,
+    }
+    write_json(staging / "data" / "manifest.json", manifest)
+    for name in STATIC_FILES:
+        if (ROOT / name).exists():
+            shutil.copy2(ROOT / name, staging / name)
+
+    if output.exists():
+        old = output.with_name(output.name + ".old")
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(output, old)
+        os.replace(staging, output)
+        shutil.rmtree(old)
+    else:
+        os.replace(staging, output)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export ideas.db as a static site")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="publish directory (default: public)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="ideas per page and shard")
+    args = parser.parse_args(argv)
+    if args.page_size < 1:
+        parser.error("--page-size must be at least 1")
+    try:
+        manifest = export(args.output, args.page_size)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    for listing, info in manifest["listings"].items():
+        print(f"{listing}: {info['ideas']} ideas in {info['pages']} pages")
+    print(f"✅ Exported data version {manifest['version']} to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
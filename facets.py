@@ -0,0 +1,34 @@
+"""
+Idea Tracker - Filter Facets
+Builds the filter link rows from get_facets() counts, shared by server.py and app.py
+"""
+
+STATUS_LABELS = {'new': 'Neu', 'interesting': 'Interessant', 'validated': 'Validiert', 'reject': 'Verworfen'}
+FACET_LIMIT = 12  # most frequent categories and sources offered as filters
+FACET_ROWS = (('status', 'Alle'), ('category', 'Alle Kategorien'), ('source', 'Alle Quellen'))
+
+def facet_rows(filters, facets, url, listing=True):
+    """One list of (url, label, count, active) links per facet
+
+    url turns a filters dict into the link target. Categories and sources
+    are cut to the FACET_LIMIT most frequent values (plus the selected one);
+    counts say how many ideas a click on the value would list. listing=False
+    (search results) marks no "all" link as active.
+    """
+    rows = []
+    for name, everything in FACET_ROWS:
+        counts = facets[name]
+        selected = filters.get(name)
+        if name == 'status':
+            values = list(STATUS_LABELS)
+        else:
+            values = sorted(counts, key=lambda value: (-counts[value], value))[:FACET_LIMIT]
+            if selected and selected not in values:
+                values.append(selected)
+            if not values:
+                continue
+        links = [(url({**filters, name: None}), everything, None, listing and not selected)]
+        links += [(url({**filters, name: value}), STATUS_LABELS.get(value, value) if name == 'status' else value,
+                   counts.get(value, 0), selected == value) for value in values]
+        rows.append(links)
+    return rows
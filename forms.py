@@ -0,0 +1,131 @@
+"""
+Idea Tracker - Form Parsing
+Size-limited parsing of urlencoded and multipart/form-data request bodies
+"""
+
+from urllib.parse import parse_qsl
+
+MAX_BODY_SIZE = 64 * 1024   # whole request body
+MAX_FIELD_SIZE = 16 * 1024  # any single value
+MAX_FIELDS = 32
+
+class FormError(Exception):
+    """A request body that is rejected; status is the HTTP status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def parse_header_value(value):
+    """Split 'type/sub; key=value; ...' into ('type/sub', {key: value})"""
+    main, *items = value.split(';')
+    params = {}
+    for item in items:
+        key, _, val = item.strip().partition('=')
+        val = val.strip()
+        if len(val) >= 2 and val[0] == val[-1] == '"':
+            val = val[1:-1]
+        params[key.strip().lower()] = val
+    return main.strip().lower(), params
+
+def read_form(rfile, headers, max_body=MAX_BODY_SIZE, max_field=MAX_FIELD_SIZE, max_fields=MAX_FIELDS):
+    """Read exactly Content-Length bytes and parse them into {name: value}
+
+    Everything that can be decided from the headers (missing length,
+    oversized body, unsupported type) is rejected before reading. For
+    repeated names the first value wins. Raises FormError.
+    """
+    if 'chunked' in headers.get('Transfer-Encoding', '').lower():
+        raise FormError(411, "Chunked request bodies are not supported")
+    length = headers.get('Content-Length')
+    if length is None:
+        raise FormError(411, "Content-Length required")
+    try:
+        length = int(length)
+    except ValueError:
+        raise FormError(400, "Invalid Content-Length") from None
+    if length < 0:
+        raise FormError(400, "Invalid Content-Length")
+    if length > max_body:
+        raise FormError(413, f"Request body larger than {max_body} bytes")
+
+    content_type, params = parse_header_value(headers.get('Content-Type', ''))
+    if content_type == 'application/x-www-form-urlencoded':
+        parse = _parse_urlencoded
+    elif content_type == 'multipart/form-data':
+        boundary = params.get('boundary', '')
+        if not boundary or len(boundary) > 70:
+            raise FormError(400, "Missing or invalid multipart boundary")
+        parse = lambda body, max_field, max_fields: _parse_multipart(body, boundary.encode('latin-1'), max_field, max_fields)
+    else:
+        raise FormError(415, "Expected application/x-www-form-urlencoded or multipart/form-data")
+
+    body = rfile.read(length)
+    if len(body) != length:
+        raise FormError(400, "Request body shorter than Content-Length")
+    return parse(body, max_field, max_fields)
+
+def _add_field(fields, name, value, max_field, max_fields):
+    if len(value) > max_field:
+        raise FormError(413, f"Field {name!r} larger than {max_field} bytes")
+    if name not in fields:
+        if len(fields) >= max_fields:
+            raise FormError(413, f"More than {max_fields} fields")
+        fields[name] = value
+
+def _parse_urlencoded(body, max_field, max_fields):
+    try:
+        pairs = parse_qsl(body.decode('ascii'), keep_blank_values=True, encoding='utf-8', errors='strict')
+    except (UnicodeDecodeError, ValueError):
+        raise FormError(400, "Malformed urlencoded body") from None
+    fields = {}
+    for name, value in pairs:
+        _add_field(fields, name, value, max_field, max_fields)
+    return fields
+
+def _parse_multipart(body, boundary, max_field, max_fields):
+    """Parse a multipart body in place, slicing values out of one memoryview"""
+    delimiter = b'\r\n--' + boundary
+    view = memoryview(body)
+    # The first delimiter may come without the leading CRLF
+    if body.startswith(delimiter[2:]):
+        pos = len(delimiter) - 2
+    else:
+        pos = body.find(delimiter)
+        if pos < 0:
+            raise FormError(400, "Malformed multipart body")
+        pos += len(delimiter)
+
+    fields = {}
+    while True:
+        if body.startswith(b'--', pos):
+            return fields  # closing delimiter
+        if not body.startswith(b'\r\n', pos):
+            raise FormError(400, "Malformed multipart body")
+        header_end = body.find(b'\r\n\r\n', pos + 2)
+        part_end = body.find(delimiter, pos + 2)
+        if header_end < 0 or part_end < 0 or header_end > part_end:
+            raise FormError(400, "Malformed multipart body")
+
+        name = filename = None
+        for line in bytes(view[pos + 2:header_end]).decode('utf-8', 'replace').split('\r\n'):
+            header, _, value = line.partition(':')
+            if header.strip().lower() == 'content-disposition':
+                disposition, params = parse_header_value(value)
+                if disposition == 'form-data':
+                    name, filename = params.get('name'), params.get('filename')
+        if name is None:
+            raise FormError(400, "Multipart section without a field name")
+        if filename is not None:
+            raise FormError(415, "File uploads are not accepted")
+
+        value = view[header_end + 4:part_end]
+        if len(value) > max_field:
+            raise FormError(413, f"Field {name!r} larger than {max_field} bytes")
+        try:
+            text = str(value, 'utf-8')
+        except UnicodeDecodeError:
+            raise FormError(400, f"Field {name!r} is not valid UTF-8") from None
+        _add_field(fields, name, text, max_field, max_fields)
+        pos = part_end + len(delimiter)
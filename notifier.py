@@ -0,0 +1,178 @@
+"""
+Idea Tracker - Telegram Notifier
+Delivers messages from a background thread so callers never wait on the network
+"""
+
+import os
+import json
+import time
+import random
+import threading
+import http.client
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlsplit
+
+CONFIG_PATH = Path.home() / ".openclaw" / "openclaw.json"
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "7619802592")
+COALESCE_WINDOW = float(os.environ.get("NOTIFY_COALESCE_WINDOW", "2"))  # seconds to gather a burst
+MAX_MESSAGE_LENGTH = 4096  # Telegram's limit per message
+MAX_ATTEMPTS = 5
+BACKOFF = 1.0  # seconds before the first retry, doubled after each
+HTTP_TIMEOUT = 10
+
+@lru_cache(maxsize=1)
+def load_token():
+    """Bot token from TELEGRAM_BOT_TOKEN or the OpenClaw config, read once"""
+    token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    if token is not None:
+        return token
+    try:
+        with open(CONFIG_PATH) as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return ""
+    return config.get("channels", {}).get("telegram", {}).get("botToken", "")
+
+def build_digest(texts, limit=MAX_MESSAGE_LENGTH):
+    """Join queued texts into as few messages as fit Telegram's size limit"""
+    messages, current = [], ""
+    for text in texts:
+        while len(text) > limit:
+            if current:
+                messages.append(current)
+                current = ""
+            messages.append(text[:limit])
+            text = text[limit:]
+        if current and len(current) + 2 + len(text) > limit:
+            messages.append(current)
+            current = ""
+        current = f"{current}\n\n{text}" if current else text
+    if current:
+        messages.append(current)
+    return messages
+
+class Notifier:
+    """Queue of outgoing Telegram messages with a single sender thread
+
+    Messages arriving within coalesce_window of each other go out as one
+    digest. Delivery reuses one keep-alive connection and retries with
+    backoff, honouring Telegram's retry_after on 429 responses.
+    """
+
+    def __init__(self, token, chat_id=TELEGRAM_CHAT_ID, base_url=TELEGRAM_API_URL,
+                 coalesce_window=COALESCE_WINDOW, max_attempts=MAX_ATTEMPTS):
+        self.token = token
+        self.chat_id = chat_id
+        self.coalesce_window = coalesce_window
+        self.max_attempts = max_attempts
+        url = urlsplit(base_url)
+        self._https = url.scheme == "https"
+        self._host = url.netloc
+        self._path = url.path.rstrip("/")
+        self._conn = None
+        self._queue = deque()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.sent = 0
+        self.failed = 0
+
+    def send(self, text):
+        """Queue a message; returns at once, False if no token is configured"""
+        if not self.token:
+            return False
+        with self._cond:
+            self._queue.append(text)
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is delivered or dropped; returns True if so"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # Give a burst a moment to finish so it becomes one digest
+                deadline = time.monotonic() + self.coalesce_window
+                while (remaining := deadline - time.monotonic()) > 0:
+                    self._cond.wait(remaining)
+                texts = list(self._queue)
+                self._queue.clear()
+            for message in build_digest(texts):
+                if self._deliver(message):
+                    self.sent += 1
+                else:
+                    self.failed += 1
+            with self._cond:
+                self._pending -= len(texts)
+                self._cond.notify_all()
+
+    def _deliver(self, text):
+        body = json.dumps({"chat_id": self.chat_id, "text": text, "parse_mode": "Markdown"}).encode()
+        for attempt in range(self.max_attempts):
+            delay = BACKOFF * 2 ** attempt
+            try:
+                status, reply = self._post(f"{self._path}/bot{self.token}/sendMessage", body)
+            except (OSError, http.client.HTTPException):
+                self._close()
+            else:
+                if status == 200:
+                    return True
+                if status == 429:
+                    delay = max(delay, reply.get("parameters", {}).get("retry_after", 0))
+                elif status < 500:
+                    return False  # rejected for good, e.g. bad token or malformed Markdown
+            if attempt + 1 < self.max_attempts:
+                time.sleep(delay + random.uniform(0, delay / 2))
+        return False
+
+    def _post(self, path, body):
+        if self._conn is None:
+            connection = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            self._conn = connection(self._host, timeout=HTTP_TIMEOUT)
+        self._conn.request("POST", path, body, {"Content-Type": "application/json"})
+        response = self._conn.getresponse()
+        data = response.read()
+        if response.getheader("Connection", "").lower() == "close":
+            self._close()
+        try:
+            reply = json.loads(data)
+        except ValueError:
+            reply = {}
+        return response.status, reply if isinstance(reply, dict) else {}
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+def get_notifier():
+    """The process-wide notifier, created on first use"""
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = Notifier(load_token())
+        return _notifier
+
+def notify(text):
+    return get_notifier().send(text)
@@ -0,0 +1,53 @@
+"""
+Idea Tracker - Static Precompression
+Writes .gz (and .br, if brotli is installed) next to static files at maximum compression
+
+    python precompress.py [directory]
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from compression import ENCODINGS, MIN_COMPRESS_SIZE, compress
+
+COMPRESSIBLE = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml'}
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+SKIP_DIRS = {'.git', '__pycache__', 'node_modules', 'venv', '.venv'}
+
+def static_files(root):
+    for path in sorted(root.rglob('*')):
+        if SKIP_DIRS.intersection(path.relative_to(root).parts):
+            continue
+        if path.is_file() and path.suffix in COMPRESSIBLE and path.stat().st_size >= MIN_COMPRESS_SIZE:
+            yield path
+
+def precompress(root):
+    """Compress every static file under root whose variants are missing or stale"""
+    written = []
+    for path in static_files(root):
+        data = None
+        for encoding in ENCODINGS:
+            target = path.with_name(path.name + SUFFIXES[encoding])
+            if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+                continue
+            if data is None:
+                data = path.read_bytes()
+            compressed = compress(data, encoding, best=True)
+            if len(compressed) >= len(data):
+                continue
+            target.write_bytes(compressed)
+            written.append((target, len(data), len(compressed)))
+    return written
+
+def main(argv=None):
+    root = Path((argv if argv is not None else sys.argv[1:] or ['.'])[0])
+    written = precompress(root)
+    for target, size, compressed in written:
+        print(f"{target}: {size} -> {compressed} bytes ({size / compressed:.1f}x)")
+    print(f"{len(written)} compressed files written")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
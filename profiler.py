@@ -0,0 +1,89 @@
+"""
+Idea Tracker - Slow Request Profiler
+Samples the stacks of threads serving requests and keeps the profiles of slow ones
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+MAX_PROFILES = 200       # older dumps are deleted
+
+def fold(frame):
+    """One stack as 'outer;...;inner', the format flame graph tools read"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{Path(code.co_filename).stem}.{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+class SlowRequestProfiler:
+    """Statistical profiler for requests slower than threshold seconds
+
+    While a request is registered, a background thread samples its stack
+    every interval via sys._current_frames(); nothing is traced, so the
+    cost for the request itself is near zero. Profiles of requests that
+    turn out slow are written as folded stacks into directory.
+    """
+
+    def __init__(self, threshold, directory, interval=SAMPLE_INTERVAL, max_profiles=MAX_PROFILES):
+        self.threshold = threshold
+        self.directory = Path(directory)
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self._active = {}  # thread id -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dumped = 0
+
+    def start(self):
+        """Begin sampling the calling thread; returns a token for stop()"""
+        samples = Counter()
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active[thread_id] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        return thread_id, samples
+
+    def stop(self, token, elapsed, label):
+        """End sampling; returns the path of the dumped profile if the request was slow"""
+        thread_id, samples = token
+        with self._lock:
+            self._active.pop(thread_id, None)
+        if elapsed < self.threshold or not samples:
+            return None
+        return self._dump(samples, elapsed, label)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, samples in active:
+                frame = frames.get(thread_id)
+                if frame is not None and thread_id != own:
+                    samples[fold(frame)] += 1
+
+    def _dump(self, samples, elapsed, label):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', label).strip('-') or 'request'
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        path = self.directory / f"{stamp}-{int(elapsed * 1000)}ms-{slug}.folded"
+        path.write_text(''.join(f"{stack} {count}\n" for stack, count in samples.most_common()))
+        self.dumped += 1
+        profiles = sorted(self.directory.glob('*.folded'))
+        for old in profiles[:-self.max_profiles]:
+            old.unlink(missing_ok=True)
+        return path
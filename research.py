@@ -3,13 +3,20 @@ Idea Research Module
 Searches for REAL problems people face that could be solved with SaaS/Micro-SaaS
 """
 
+import os
 import json
 import sys
+import time
+import random
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from database import init_db, add_idea, log_research
+from notifier import notify, get_notifier
+from database import init_db, add_ideas, log_research, get_cached_research, cache_research, RESEARCH_CACHE_TTL
 
 # IMPROVED: These search terms find PROBLEMS people have, not SaaS problems
 # We search for things people wish existed or complain about
@@ -46,25 +53,129 @@ PROBLEM_CATEGORIES = [
     "security",         # Privacy, passwords, safety
 ]
 
-def run_web_research():
-    """Run actual web searches to find problems"""
+# Search runner settings; a backend is any callable(query, count) returning
+# a dict with 'results' (or 'error'), RESEARCH_BACKEND names one as "module:function"
+RESEARCH_BACKEND = os.environ.get("RESEARCH_BACKEND", "")
+RESEARCH_CONCURRENCY = int(os.environ.get("RESEARCH_CONCURRENCY", "5"))
+RESEARCH_TIMEOUT = float(os.environ.get("RESEARCH_TIMEOUT", "20"))  # seconds per attempt
+RESEARCH_RETRIES = int(os.environ.get("RESEARCH_RETRIES", "2"))
+RESEARCH_BACKOFF = 1.0  # seconds before the first retry, doubled after each
+RESULTS_PER_QUERY = 10
+NOTIFY_FLUSH_TIMEOUT = 15  # seconds to wait for Telegram delivery at exit
+
+class SearchError(Exception):
+    """A search that failed after all retries"""
+
+def load_backend(spec=RESEARCH_BACKEND):
+    """Resolve the search backend, or None if none is available"""
+    if spec:
+        module, _, name = spec.partition(":")
+        return getattr(importlib.import_module(module), name or "web_search")
     try:
         from tools import web_search
     except ImportError:
+        return None
+    def tools_web_search(query, count):
+        return web_search(query=query, count=count)
+    return tools_web_search
+
+def backend_name(backend):
+    """Stable name of a backend, part of the research cache key"""
+    return f"{backend.__module__}:{getattr(backend, '__qualname__', type(backend).__name__)}"
+
+def normalize_query(query):
+    return " ".join(query.casefold().split())
+
+def call_with_timeout(func, timeout, *args):
+    """Run func in a daemon thread and give up on it after timeout seconds
+    
+    A hung search cannot be interrupted, but it no longer holds up the pass;
+    the abandoned thread dies with the process.
+    """
+    outcome = {}
+    def run():
+        try:
+            outcome["result"] = func(*args)
+        except BaseException as e:
+            outcome["error"] = e
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        raise TimeoutError(f"no answer after {timeout:g}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+def search_with_retry(backend, query, count=RESULTS_PER_QUERY, timeout=RESEARCH_TIMEOUT, retries=RESEARCH_RETRIES):
+    """One query with a timeout per attempt and jittered exponential backoff"""
+    for attempt in range(retries + 1):
+        try:
+            result = call_with_timeout(backend, timeout, query, count)
+            if result and result.get("error"):
+                raise SearchError(result["error"])
+            return result or {"results": []}
+        except Exception as e:
+            if attempt == retries:
+                raise SearchError(f"{query!r} failed after {attempt + 1} attempts: {e}") from e
+            delay = RESEARCH_BACKOFF * 2 ** attempt
+            time.sleep(delay + random.uniform(0, delay))
+
+def search_all(queries, backend, concurrency=RESEARCH_CONCURRENCY, timeout=RESEARCH_TIMEOUT,
+               retries=RESEARCH_RETRIES, ttl=RESEARCH_CACHE_TTL):
+    """Run queries concurrently; returns {query: result}, None for failed ones
+    
+    Queries that only differ in case or spacing are searched once, and only
+    those without a cached result younger than ttl seconds (0 disables the
+    cache) reach the backend. Fresh results are cached and logged.
+    """
+    unique = {}
+    for query in queries:
+        unique.setdefault(normalize_query(query), query)
+    
+    name = backend_name(backend)
+    results, pending = {}, {}
+    for key, query in unique.items():
+        cached = get_cached_research(name, key, ttl) if ttl else None
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending[key] = query
+    
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending))), thread_name_prefix="research") as pool:
+            futures = {key: pool.submit(search_with_retry, backend, query, RESULTS_PER_QUERY, timeout, retries)
+                       for key, query in pending.items()}
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except SearchError as e:
+                    print(f"Search error: {e}")
+                    results[key] = None
+                    continue
+                if ttl:
+                    cache_research(name, key, results[key], ttl)
+                titles = [item.get("title", "") for item in results[key].get("results", []) if isinstance(item, dict)]
+                log_research(pending[key], name, json.dumps(titles))
+    return {query: results[normalize_query(query)] for query in queries}
+
+def run_web_research(queries=RESEARCH_QUERIES, backend=None):
+    """Run actual web searches to find problems"""
+    backend = backend or load_backend()
+    if backend is None:
         print("Web search not available - using static ideas only")
         return []
+    init_db()
     
     all_ideas = []
     
-    for query in RESEARCH_QUERIES[:5]:  # Limit to 5 searches
-        try:
-            result = web_search(query=query, count=10)
-            if result and not result.get("error"):
-                print(f"Found {len(result.get('results', []))} results for: {query}")
-                # Process results and extract problems
-                # For now, just log that we found them
-        except Exception as e:
-            print(f"Search error for '{query}': {e}")
+    started = time.monotonic()
+    for query, result in search_all(queries, backend).items():
+        if result is not None:
+            print(f"Found {len(result.get('results', []))} results for: {query}")
+            # Process results and extract problems
+            # For now, just log that we found them
+    print(f"Searched {len(queries)} queries in {time.monotonic() - started:.1f}s")
     
     return all_ideas
 
@@ -173,43 +284,18 @@ def run_research():
         },
     ]
     
-    added = 0
-    for idea in ideas_from_research:
-        add_idea(**idea)
-        added += 1
+    # Ideas we already track (exactly or nearly) are skipped
+    results = add_ideas(ideas_from_research, on_duplicate='skip')
+    new_ideas = [idea for idea, (_, outcome) in zip(ideas_from_research, results) if outcome == 'inserted']
     
     # Log the research
-    log_research("web_research", "research", json.dumps([i['title'] for i in ideas_from_research]))
+    log_research("web_research", "research", json.dumps([i['title'] for i in new_ideas]))
     
-    return added, ideas_from_research
+    return len(new_ideas), new_ideas
 
 def format_telegram_message(text):
-    """Send message via Telegram"""
-    import subprocess
-    from pathlib import Path
-    
-    CONFIG_PATH = Path.home() / ".openclaw" / "openclaw.json"
-    try:
-        with open(CONFIG_PATH) as f:
-            config = json.load(f)
-        token = config.get("channels", {}).get("telegram", {}).get("botToken", "")
-        user_id = "7619802592"
-        
-        if not token:
-            return False
-        
-        url = f"https://api.telegram.org/bot{token}/sendMessage"
-        
-        cmd = [
-            "curl", "-s", "-X", "POST", url,
-            "-H", "Content-Type: application/json",
-            "-d", f'{{"chat_id": "{user_id}", "text": {json.dumps(text)}, "parse_mode": "Markdown"}}'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        return result.returncode == 0
-    except:
-        return False
+    """Send message via Telegram; queued, delivery happens in the background"""
+    return notify(text)
 
 def send_research_summary(added, findings):
     """Send research summary to Telegram"""
@@ -226,3 +312,5 @@ if __name__ == "__main__":
     added, findings = run_research()
     print(f"Füge {added} Ideen hinzu")
     send_research_summary(added, findings)
+    # Give the notifier a bounded chance to deliver before the process exits
+    get_notifier().flush(timeout=NOTIFY_FLUSH_TIMEOUT)
@@ -1,43 +1,81 @@
 #!/usr/bin/env python3
 import sys
+import os
 import http.server
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from html import escape
+from email.utils import format_datetime, parsedate_to_datetime
 from pathlib import Path
-from urllib.parse import urlparse, parse_qs
-import cgi
+from urllib.parse import urlparse, parse_qs, urlencode
+import re
 import hashlib
+import hmac
+import json
 import secrets
 import time
+import functools
+import itertools
 
 sys.path.insert(0, str(Path(__file__).parent))
-from database import init_db, get_all_ideas, get_ideas_by_status, get_stats, add_idea, update_idea_status
+from forms import FormError, read_form
+from api import parse_ideas_query, parse_changes_query, render_ideas_page, render_ideas_ndjson, render_changes
+from facets import facet_rows
+from compression import MIN_COMPRESS_SIZE, negotiate, compress, compress_stream
+from sessions import SESSION_TIMEOUT, create_session, validate_session, revoke_session, session_count
+from metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE, Counter, Gauge, Histogram, timed_iter
+from profiler import SlowRequestProfiler
+from backup import BACKUP_INTERVAL, BACKUP_DIR, BackupScheduler
+from database import SNIPPET_START, SNIPPET_END, SEARCH_WINDOW
+from database import init_db, decode_cursor, get_ideas_page, search_ideas, get_stats, get_data_version, add_idea, update_idea_status
+from database import update_ideas_status, get_ideas_by_ids, get_changes_min_seq, get_facets
 
 # Simple password protection
 # Change this to your desired password!
 PASSWORD = "alfred2026"
 SESSION_COOKIE_NAME = "idea_tracker_session"
-SESSION_TIMEOUT = 60 * 60 * 24  # 24 hours
 
-# In-memory session store (for single-instance server)
-sessions = {}
+# Serving mode: "pool" runs requests on a bounded worker pool, "single" is
+# the old one-request-at-a-time HTTPServer.
+SERVER_MODE = os.environ.get("SERVER_MODE", "pool")
+WORKERS = int(os.environ.get("WORKERS", min(32, (os.cpu_count() or 1) * 4)))
+MAX_IN_FLIGHT = int(os.environ.get("MAX_IN_FLIGHT", 256))  # open connections, queued or running
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", 30))  # slow client timeout in seconds
+# Seconds a connection may sit idle before (or between keep-alive) requests;
+# an idle connection still holds a pool worker, so this stays short.
+IDLE_TIMEOUT = float(os.environ.get("IDLE_TIMEOUT", 2))
+STREAM_CHUNK_SIZE = 16 * 1024  # bytes collected before a chunk is written
+API_TOKEN = os.environ.get("API_TOKEN", "")  # accepted as "Authorization: Bearer <token>"
 
-def create_session():
-    """Create a new session token"""
-    token = secrets.token_hex(16)
-    sessions[token] = time.time()
-    return token
+# /metrics needs a login unless METRICS_TOKEN is set, then only that bearer token.
+# With PROFILE_SLOW_MS > 0 requests are sampled and slow ones dumped to PROFILE_DIR.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 0))
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR") or Path(__file__).parent / "profiles")
 
-def validate_session(token):
-    """Check if session is valid and not expired"""
-    if not token:
-        return False
-    if token not in sessions:
-        return False
-    if time.time() - sessions[token] > SESSION_TIMEOUT:
-        del sessions[token]
-        return False
-    # Extend session
-    sessions[token] = time.time()
-    return True
+REQUEST_SECONDS = Histogram('idea_tracker_request_seconds', 'Request latency by route', ['method', 'route', 'status'])
+RESPONSE_BYTES = Counter('idea_tracker_response_bytes', 'Response body bytes sent by route', ['route'])
+RENDER_SECONDS = Histogram('idea_tracker_render_seconds', 'Time spent rendering pages by kind', ['kind'])
+RENDER_CACHE_REQUESTS = Counter('idea_tracker_render_cache_requests', 'Render cache lookups by outcome', ['outcome'])
+OVERLOADED = Counter('idea_tracker_overloaded_connections', 'Connections turned away with 503')
+Gauge('idea_tracker_sessions', 'Active login sessions', func=session_count)
+
+profiler = SlowRequestProfiler(PROFILE_SLOW_MS / 1000, PROFILE_DIR) if PROFILE_SLOW_MS > 0 else None
+
+ROUTES = ('/', '/login', '/logout', '/search', '/add', '/metrics', '/api/ideas', '/api/ideas.ndjson', '/api/ideas/status', '/api/changes')
+IDEA_STATUS_PATH = re.compile(r'/api/ideas/(\d+)/status')
+
+def route_name(path):
+    """Bounded route label for metrics; ids and unknown paths are folded"""
+    if path in ROUTES:
+        return path
+    if path.startswith('/status/'):
+        return '/status'
+    if IDEA_STATUS_PATH.fullmatch(path):
+        return '/api/ideas/:id/status'
+    return 'other'
 
 def generate_login_html():
     return """<!DOCTYPE html>
@@ -71,127 +109,533 @@ def generate_login_html():
 
 HTML = open(Path(__file__).parent / "template.html").read()
 
-def generate_html(status=None):
-    ideas = get_ideas_by_status(status) if status else get_all_ideas()
-    stats = get_stats()
+def split_template(template):
+    """Split a template once into static byte segments and placeholder names"""
+    parts = []
+    for i, piece in enumerate(re.split(r'\{\{([A-Z_]+)\}\}', template)):
+        parts.append(piece if i % 2 else piece.encode())
+    return parts
+
+TEMPLATE_PARTS = split_template(HTML)
+
+RENDER_CACHE_SIZE = 64  # rendered pages kept per data version
+RENDER_ID = secrets.token_hex(4)  # changes ETags whenever the server restarts
+
+class RenderCache:
+    """LRU of rendered pages that are only valid for one data version
     
-    ideas_html = ""
-    for idea in ideas:
-        is_new = 'status-new' if idea['status'] == 'new' else ''
-        is_interesting = 'status-interesting' if idea['status'] == 'interesting' else ''
-        is_validated = 'status-validated' if idea['status'] == 'validated' else ''
-        is_reject = 'status-reject' if idea['status'] == 'reject' else ''
-        
-        ideas_html += f"""
-            <div class="idea">
-                <h3>{idea['title']}</h3>
-                <p class="problem">Problem: {idea['problem']}</p>
-        """
-        if idea['description']:
-            ideas_html += f'<p class="description">{idea["description"]}</p>'
-        if idea['existing_solutions']:
-            ideas_html += f'<p><strong>Bestehende Lösungen:</strong> {idea["existing_solutions"]}</p>'
-        
-        ideas_html += f"""
+    Each page keeps its plain body and any compressed variants together,
+    keyed by content encoding (None for the plain body).
+    """
+    
+    def __init__(self, max_entries=RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+    
+    def get(self, key, version, encoding=None):
+        with self.lock:
+            if version != self.version:
+                return None
+            variants = self.entries.get(key)
+            if variants is None:
+                return None
+            self.entries.move_to_end(key)
+            return variants.get(encoding)
+    
+    def put(self, key, version, body, encoding=None):
+        with self.lock:
+            if version != self.version:
+                if self.version is not None and version < self.version:
+                    return  # rendered from older data than what is cached
+                self.entries.clear()
+                self.version = version
+            self.entries.setdefault(key, {})[encoding] = body
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.version = None
+
+render_cache = RenderCache()
+Gauge('idea_tracker_render_cache_entries', 'Pages held in the render cache', func=lambda: len(render_cache.entries))
+
+def page_etag(key, version, encoding=None):
+    """ETag for a page, known before it is rendered; each encoding gets its own"""
+    digest = hashlib.sha1(f'{RENDER_ID}:{version}:{key!r}'.encode()).hexdigest()[:20]
+    return f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+def http_date(timestamp):
+    """Format an SQLite UTC timestamp as an HTTP date"""
+    dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    return format_datetime(dt, usegmt=True)
+
+def page_url(filters=None, cursor=None):
+    """Link to a listing page, keeping the filters"""
+    params = {k: v for k, v in (*(filters or {}).items(), ('cursor', cursor)) if v}
+    return '/?' + urlencode(params) if params else '/'
+
+def generate_pager(filters, cursor, next_cursor):
+    links = []
+    if cursor:
+        links.append(f'<a href="{escape(page_url(filters))}" class="filter">← Zum Anfang</a>')
+    if next_cursor:
+        links.append(f'<a href="{escape(page_url(filters, next_cursor))}" class="filter">Weitere Ideen →</a>')
+    return f'<div class="pager">{"".join(links)}</div>' if links else ''
+
+def filter_link(url, label, count=None, active=False):
+    active = ' active' if active else ''
+    count = f' <small>{count}</small>' if count is not None else ''
+    return f'<a href="{escape(url)}" class="filter{active}">{escape(label)}{count}</a>'
+
+def generate_filters(filters, facets):
+    """One row of filter links per facet, each value with the number of ideas it lists"""
+    rows = (''.join(filter_link(*link) for link in links) for links in facet_rows(filters, facets, page_url))
+    return '\n        '.join(f'<div class="filters">{row}</div>' for row in rows)
+
+# Shown when a search had more matches than search_ideas() ranks
+SEARCH_CUTOFF = (f' – mehr als {SEARCH_WINDOW} Treffer, nur die {SEARCH_WINDOW} neuesten wurden nach Relevanz '
+                 'sortiert. Genauere Suchbegriffe finden auch ältere Ideen.')
+
+def peek_small(chunks, limit=MIN_COMPRESS_SIZE):
+    """Return (small, chunks): whether chunks add up to less than limit bytes, and all of them again"""
+    iterator = iter(chunks)
+    head, size = [], 0
+    for chunk in iterator:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            return False, itertools.chain(head, iterator)
+    return True, iter(head)
+
+def highlight(snippet):
+    """HTML-escape a search snippet and mark the matched words"""
+    return escape(snippet).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+def render_idea_card(idea):
+    """Render one idea card as HTML"""
+    idea_id = idea['id']
+    active = {idea['status']: "active"}
+    snippet = f'<p class="snippet">{highlight(idea["snippet"])}</p>' if idea.get('snippet') else ''
+    description = f'<p class="description">{escape(idea["description"])}</p>' if idea['description'] else ''
+    solutions = f'<p><strong>Bestehende Lösungen:</strong> {escape(idea["existing_solutions"])}</p>' if idea['existing_solutions'] else ''
+    source = f'<span>📌 {escape(idea["source"])}</span>' if idea['source'] else ''
+    category = f'<span class="tag">{escape(idea["category"])}</span>' if idea['category'] else ''
+    duplicate = f'<span class="tag duplicate">Duplikat von #{idea["duplicate_of"]}</span>' if idea.get('duplicate_of') else ''
+    return f"""
+            <div class="idea" data-id="{idea_id}">
+                <h3>{escape(idea['title'])}</h3>
+                <p class="problem">Problem: {escape(idea['problem'])}</p>
+                {snippet}{description}{solutions}
                 <div class="meta">
                     <span>📅 {idea['created_at'][:10]}</span>
-        """
-        if idea['source']:
-            ideas_html += f'<span>📌 {idea["source"]}</span>'
-        if idea['category']:
-            ideas_html += f'<span class="tag">{idea["category"]}</span>'
-        
-        ideas_html += f"""
+                    {source}{category}{duplicate}
                 </div>
                 <div class="status-bar">
                     <span class="status-label">Status:</span>
-                    <a href="/status/{idea['id']}/new" class="status-btn status-new {is_new}">Neu</a>
-                    <a href="/status/{idea['id']}/interesting" class="status-btn status-interesting {is_interesting}">Interessant</a>
-                    <a href="/status/{idea['id']}/validated" class="status-btn status-validated {is_validated}">Validiert</a>
-                    <a href="/status/{idea['id']}/reject" class="status-btn status-reject {is_reject}">Verwerfen</a>
+                    <a href="/status/{idea_id}/new" class="status-btn status-new {active.get('new', '')}">Neu</a>
+                    <a href="/status/{idea_id}/interesting" class="status-btn status-interesting {active.get('interesting', '')}">Interessant</a>
+                    <a href="/status/{idea_id}/validated" class="status-btn status-validated {active.get('validated', '')}">Validiert</a>
+                    <a href="/status/{idea_id}/reject" class="status-btn status-reject {active.get('reject', '')}">Verwerfen</a>
+                    <input type="checkbox" class="select" value="{idea_id}" aria-label="Auswählen">
                 </div>
             </div>"""
+
+def render_page(status=None, cursor=None, query=None, category=None, source=None, include_archived=False):
+    """Yield the index page as byte chunks: template segments and one chunk per idea
     
-    html = HTML
-    html = html.replace("{{TOTAL}}", str(stats['total']))
-    html = html.replace("{{NEW}}", str(stats['new']))
-    html = html.replace("{{INTERESTING}}", str(stats['interesting']))
-    html = html.replace("{{VALIDATED}}", str(stats['validated']))
-    html = html.replace("{{REJECTED}}", str(stats['rejected']))
-    html = html.replace("{{IDEAS}}", ideas_html)
-    
-    # Active filter
-    is_active = {"": "active", "new": "", "interesting": "", "validated": "", "reject": ""}
-    if status:
-        is_active[status] = "active"
-    
-    html = html.replace("{{IS_ALL}}", is_active.get("", ""))
-    html = html.replace("{{IS_NEW}}", is_active.get("new", ""))
-    html = html.replace("{{IS_INTERESTING}}", is_active.get("interesting", ""))
-    html = html.replace("{{IS_VALIDATED}}", is_active.get("validated", ""))
-    html = html.replace("{{IS_REJECT}}", is_active.get("reject", ""))
-    
-    return html
-
-def get_session_from_cookie(self):
-    """Extract session cookie"""
-    cookie = self.headers.get('Cookie', '')
-    for item in cookie.split(';'):
-        item = item.strip()
-        if item.startswith(f'{SESSION_COOKIE_NAME}='):
-            return item.split('=', 1)[1]
-    return None
-
-def check_auth(self):
-    """Check if user is authenticated"""
-    token = self.get_session_from_cookie()
-    return validate_session(token)
-
-def send_login_page(self, error=False):
-    """Send login page"""
-    html = generate_login_html()
-    if error:
-        html = html.replace('{{ERROR}}', '<p class="error">Falsches Passwort</p>')
+    With a search query the page lists the best matches instead of a
+    filtered listing; include_archived searches the archive too.
+    """
+    filters = {'status': status, 'category': category, 'source': source}
+    partial = False
+    if query is not None:
+        filters = dict.fromkeys(filters)
+        ideas, partial = search_ideas(query, include_archived=include_archived)
+        next_cursor = None
     else:
-        html = html.replace('{{ERROR}}', '')
+        ideas, next_cursor = get_ideas_page(status, cursor, category=category, source=source)
+    stats = get_stats()
+    
+    values = {
+        "TOTAL": str(stats['total']),
+        "NEW": str(stats['new']),
+        "INTERESTING": str(stats['interesting']),
+        "VALIDATED": str(stats['validated']),
+        "REJECTED": str(stats['rejected']),
+        "PAGER": generate_pager(filters, cursor, next_cursor),
+        "FILTERS": generate_filters(filters, get_facets(**filters)),
+        "QUERY": escape(query or ""),
+        "ARCHIVED": " checked" if include_archived else "",
+        "SEARCH_INFO": "",
+    }
+    if query is not None:
+        values["SEARCH_INFO"] = f'<p class="search-info">{len(ideas)} Treffer für „{escape(query)}“{SEARCH_CUTOFF if partial else ""}</p>'
     
-    self.send_response(200)
-    self.send_header("Content-type", "text/html")
-    self.end_headers()
-    self.wfile.write(html.encode())
+    for part in TEMPLATE_PARTS:
+        if isinstance(part, bytes):
+            yield part
+        elif part == "IDEAS":
+            for idea in ideas:
+                yield render_idea_card(idea).encode()
+        else:
+            yield values.get(part, "").encode()
 
-def send_redirect(self, location):
-    """Send redirect"""
-    self.send_response(302)
-    self.send_header('Location', location)
-    self.end_headers()
+def generate_html(status=None, cursor=None, category=None, source=None):
+    return b''.join(render_page(status, cursor, category=category, source=source)).decode()
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """HTTP server that hands connections to a bounded pool of worker threads"""
+    
+    def __init__(self, server_address, handler_class, workers=WORKERS, max_in_flight=MAX_IN_FLIGHT):
+        super().__init__(server_address, handler_class)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='idea-tracker')
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+    
+    def process_request(self, request, client_address):
+        # Connections beyond the in-flight limit are turned away immediately
+        # instead of piling up in the executor queue.
+        if not self.in_flight.acquire(blocking=False):
+            OVERLOADED.inc()
+            try:
+                request.sendall(OVERLOADED_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self.executor.submit(self.process_request_thread, request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.in_flight.release()
+    
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+OVERLOADED_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Length: 0\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n\r\n"
+)
+
+def create_server(port, mode=SERVER_MODE):
+    """Build the HTTP server for the configured serving mode"""
+    if mode == 'single':
+        return http.server.HTTPServer(("", port), Handler)
+    if mode == 'pool':
+        return PooledHTTPServer(("", port), Handler)
+    raise ValueError(f"Unknown SERVER_MODE: {mode}")
+
+def instrumented(method):
+    """Time a do_* handler per route and status, profiling it when enabled"""
+    @functools.wraps(method)
+    def wrapper(self):
+        self.route = route_name(urlparse(self.path).path)
+        self.response_status = None
+        token = profiler.start() if profiler else None
+        started = time.perf_counter()
+        try:
+            return method(self)
+        finally:
+            elapsed = time.perf_counter() - started
+            status = self.response_status or 'aborted'
+            REQUEST_SECONDS.labels(self.command, self.route, status).observe(elapsed)
+            if token is not None:
+                profiler.stop(token, elapsed, f'{self.command} {self.route}')
+    return wrapper
 
 class Handler(http.server.SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests; every response
+    # therefore has to carry a Content-Length.
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # kept-alive connection stalls ~40ms per response on delayed ACKs.
+    disable_nagle_algorithm = True
+    route = 'other'
+    
+    def send_response(self, code, message=None):
+        self.response_status = code
+        super().send_response(code, message)
+    
+    def handle(self):
+        # Like BaseHTTPRequestHandler.handle, but the wait for each request
+        # line is bounded by IDLE_TIMEOUT; once it starts arriving the
+        # request gets the full REQUEST_TIMEOUT.
+        self.close_connection = True
+        while self.wait_for_request():
+            self.handle_one_request()
+            if self.close_connection:
+                break
+    
+    def wait_for_request(self):
+        """Wait up to IDLE_TIMEOUT for the next request; False if the client went quiet or away"""
+        self.connection.settimeout(IDLE_TIMEOUT)
+        try:
+            pending = self.rfile.peek(1)
+        except (TimeoutError, OSError):
+            return False
+        finally:
+            self.connection.settimeout(REQUEST_TIMEOUT)
+        return bool(pending)
+    
+    def get_session_from_cookie(self):
+        """Extract session cookie"""
+        cookie = self.headers.get('Cookie', '')
+        for item in cookie.split(';'):
+            item = item.strip()
+            if item.startswith(f'{SESSION_COOKIE_NAME}='):
+                return item.split('=', 1)[1]
+        return None
+    
+    def check_auth(self):
+        """Check if user is authenticated, by session cookie or bearer token"""
+        authorization = self.headers.get('Authorization', '')
+        if authorization.startswith('Bearer '):
+            token = authorization[len('Bearer '):].strip()
+            if API_TOKEN and hmac.compare_digest(token, API_TOKEN):
+                return True
+            return validate_session(token)
+        token = self.get_session_from_cookie()
+        return validate_session(token)
+    
+    def send_body(self, body, content_type="text/html; charset=utf-8", status=200, headers=()):
+        """Send a complete response with an explicit Content-Length"""
+        self.send_response(status)
+        self.send_header("Content-type", content_type)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        RESPONSE_BYTES.labels(self.route).inc(len(body))
+    
+    def send_json(self, data, status=200, headers=()):
+        self.send_body(json.dumps(data, ensure_ascii=False).encode(), "application/json; charset=utf-8", status, headers)
+    
+    def is_not_modified(self, etag, last_modified):
+        """Evaluate If-None-Match / If-Modified-Since for the current representation"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+    
+    def send_stream(self, chunks, content_type="text/html; charset=utf-8", headers=(), keep=True):
+        """Send byte chunks as they are produced; returns the complete body
+        
+        Small chunks are coalesced up to STREAM_CHUNK_SIZE before hitting the
+        socket. HTTP/1.0 clients cannot take chunked encoding; they get the
+        plain body, ended by closing the connection. With keep=False (bodies
+        nobody caches) the chunks are not collected and None is returned.
+        """
+        chunked = self.request_version != 'HTTP/1.0'
+        self.send_response(200)
+        self.send_header("Content-type", content_type)
+        for name, value in headers:
+            self.send_header(name, value)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        
+        # Once headers are out an error can only be signalled by dropping
+        # the connection before the terminating chunk.
+        close_after = self.close_connection
+        self.close_connection = True
+        sent, pending, pending_size = [], [], 0
+        for chunk in chunks:
+            if keep:
+                sent.append(chunk)
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= STREAM_CHUNK_SIZE:
+                self.write_chunk(b''.join(pending), chunked)
+                pending, pending_size = [], 0
+        if pending:
+            self.write_chunk(b''.join(pending), chunked)
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+        self.close_connection = close_after
+        return b''.join(sent) if keep else None
+    
+    def write_chunk(self, data, chunked=True):
+        self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data) if chunked else data)
+        RESPONSE_BYTES.labels(self.route).inc(len(data))
+    
+    def send_page(self, key, render, content_type="text/html; charset=utf-8", cache=True):
+        """Send a page from the render cache, streaming it on a miss, or a 304
+        
+        Clients accepting gzip (or brotli, when installed) get a compressed
+        body unless it is smaller than MIN_COMPRESS_SIZE; compressed variants
+        are cached next to the plain page. With cache=False (large exports)
+        the body is always streamed.
+        """
+        version, changed_at = get_data_version()
+        encoding = negotiate(self.headers.get('Accept-Encoding'))
+        last_modified = http_date(changed_at)
+        headers = [
+            ('Last-Modified', last_modified),
+            ('Cache-Control', 'private, no-cache'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        # A client may hold the plain variant of a page too small to encode
+        for etag in dict.fromkeys((page_etag(key, version, encoding), page_etag(key, version))):
+            if self.is_not_modified(etag, last_modified):
+                self.send_response(304)
+                for name, value in [('ETag', etag), *headers]:
+                    self.send_header(name, value)
+                self.end_headers()
+                return
+        
+        timings = RENDER_SECONDS.labels(key[0])
+        untimed = render
+        render = lambda: timed_iter(untimed(), timings)
+        if encoding:
+            plain = render_cache.get(key, version) if cache else None
+            if plain is not None:
+                small = len(plain) < MIN_COMPRESS_SIZE
+            elif cache and render_cache.get(key, version, encoding) is not None:
+                small = False
+            else:
+                # Render until the body is known to be big enough to encode
+                small, chunks = peek_small(render())
+                render = lambda: chunks
+            if small:
+                encoding = None
+        headers.insert(0, ('ETag', page_etag(key, version, encoding)))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        if not cache:
+            chunks = compress_stream(render(), encoding) if encoding else render()
+            self.send_stream(chunks, content_type, headers=headers, keep=False)
+            return
+        body = render_cache.get(key, version, encoding)
+        if body is not None:
+            RENDER_CACHE_REQUESTS.labels('hit').inc()
+            self.send_body(body, content_type, headers=headers)
+            return
+        if encoding is None:
+            RENDER_CACHE_REQUESTS.labels('miss').inc()
+            body = self.send_stream(render(), content_type, headers=headers)
+            render_cache.put(key, version, body)
+            return
+        
+        plain = render_cache.get(key, version)
+        if plain is not None:
+            RENDER_CACHE_REQUESTS.labels('compress').inc()
+            body = compress(plain, encoding)
+            render_cache.put(key, version, body, encoding)
+            self.send_body(body, content_type, headers=headers)
+            return
+        # Nothing cached: stream the compressed render and keep both variants
+        RENDER_CACHE_REQUESTS.labels('miss').inc()
+        plain_chunks = []
+        def tee():
+            for chunk in render():
+                plain_chunks.append(chunk)
+                yield chunk
+        body = self.send_stream(compress_stream(tee(), encoding), content_type, headers=headers)
+        render_cache.put(key, version, b''.join(plain_chunks))
+        render_cache.put(key, version, body, encoding)
+    
+    def send_login_page(self, error=False):
+        """Send login page"""
+        html = generate_login_html()
+        if error:
+            html = html.replace('{{ERROR}}', '<p class="error">Falsches Passwort</p>')
+        else:
+            html = html.replace('{{ERROR}}', '')
+        
+        self.send_body(html.encode())
+    
+    def send_redirect(self, location, headers=()):
+        """Send redirect"""
+        self.send_response(302)
+        self.send_header('Location', location)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def send_metrics(self):
+        """Prometheus text exposition of all metrics"""
+        if METRICS_TOKEN:
+            authorization = self.headers.get('Authorization', '')
+            allowed = hmac.compare_digest(authorization.encode(), f'Bearer {METRICS_TOKEN}'.encode())
+        else:
+            allowed = self.check_auth()
+        if not allowed:
+            self.send_body(b'Authentication required', 'text/plain; charset=utf-8', status=401,
+                           headers=[('WWW-Authenticate', 'Bearer')])
+            return
+        self.send_body(REGISTRY.render().encode(), METRICS_CONTENT_TYPE,
+                       headers=[('Cache-Control', 'no-store')])
+    
+    @instrumented
     def do_GET(self):
         parsed = urlparse(self.path)
         path = parsed.path
         query = parse_qs(parsed.query)
         status_filter = query.get('status', [None])[0]
+        category = query.get('category', [None])[0]
+        source = query.get('source', [None])[0]
+        cursor = query.get('cursor', [None])[0]
         
         # Login page
         if path == '/login':
             self.send_login_page()
             return
         
+        if path == '/metrics':
+            self.send_metrics()
+            return
+        
         # Logout
         if path == '/logout':
             cookie = self.headers.get('Cookie', '')
             for item in cookie.split(';'):
                 item = item.strip()
                 if item.startswith(f'{SESSION_COOKIE_NAME}='):
-                    token = item.split('=', 1)[1]
-                    sessions.pop(token, None)
-            self.send_redirect('/')
+                    revoke_session(item.split('=', 1)[1])
+            self.send_redirect('/', headers=[
+                ('Set-Cookie', f'{SESSION_COOKIE_NAME}=; Path=/; HttpOnly; Max-Age=0'),
+            ])
             return
         
         # Check auth for all other routes
         if not self.check_auth():
-            self.send_login_page()
+            if path.startswith('/api/'):
+                self.send_json({'error': 'Authentication required'}, status=401,
+                               headers=[('WWW-Authenticate', 'Bearer')])
+            else:
+                self.send_login_page()
+            return
+        
+        if path in ('/api/ideas', '/api/ideas.ndjson'):
+            self.send_api_ideas(query, ndjson=path.endswith('.ndjson'))
+            return
+        
+        if path == '/api/changes':
+            self.send_api_changes(query)
             return
         
         # Handle status update URLs like /status/123/new
@@ -201,84 +645,177 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                 idea_id = int(parts[2])
                 new_status = parts[3]
                 update_idea_status(idea_id, new_status)
+                render_cache.clear()
                 # Redirect to home
                 self.send_redirect('/')
                 return
         
-        html = generate_html(status_filter)
+        if path == '/search':
+            search_query = query.get('q', [''])[0].strip()
+            if not search_query:
+                self.send_redirect('/')
+                return
+            include_archived = query.get('archived', [''])[0] == '1'
+            self.send_page(('search', search_query, include_archived),
+                           lambda: render_page(query=search_query, include_archived=include_archived))
+            return
         
-        # Add session cookie header
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.send_header("Set-Cookie", f"{SESSION_COOKIE_NAME}=; Path=/; HttpOnly")
-        self.end_headers()
-        self.wfile.write(html.encode())
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                self.send_body(b'Invalid cursor', 'text/plain; charset=utf-8', status=400)
+                return
+        self.send_page(('index', status_filter, category, source, cursor),
+                       lambda: render_page(status_filter, cursor, category=category, source=source))
+    
+    def send_api_ideas(self, query, ndjson=False):
+        """Ideas as JSON pages with a next_cursor, or all of them as NDJSON"""
+        try:
+            params = parse_ideas_query({name: values[0] for name, values in query.items()})
+        except ValueError as e:
+            self.send_json({'error': str(e)}, status=400)
+            return
+        if ndjson:
+            self.send_page(('api.ndjson', *params.values()), lambda: render_ideas_ndjson(**params),
+                           'application/x-ndjson; charset=utf-8', cache=False)
+        else:
+            self.send_page(('api', *params.values()), lambda: render_ideas_page(**params),
+                           'application/json; charset=utf-8')
+    
+    def send_api_changes(self, query):
+        """Ideas changed after ?since=<seq>, oldest change first
+        
+        A mirror stores next_since and asks again with it; while more is
+        true further changes are waiting. 410 means deletions it has not
+        seen were compacted away and it has to sync again from since=0.
+        """
+        try:
+            params = parse_changes_query({name: values[0] for name, values in query.items()})
+        except ValueError as e:
+            self.send_json({'error': str(e)}, status=400)
+            return
+        min_seq = get_changes_min_seq()
+        if 0 < params['since'] < min_seq:
+            self.send_json({'error': 'Change feed compacted, sync again from since=0',
+                            'reset': True, 'min_seq': min_seq}, status=410)
+            return
+        self.send_page(('changes', *params.values()), lambda: render_changes(**params),
+                       'application/json; charset=utf-8')
+    
+    def send_status_change(self, form, idea_id=None):
+        """Change the status of one idea (answering with its card) or of many ids
+        
+        Both answer with the stats delta instead of a re-rendered page.
+        """
+        if idea_id is None:
+            try:
+                ids = [int(value) for value in form.get('ids', '').split(',') if value.strip()]
+            except ValueError:
+                self.send_json({'error': 'ids must be comma-separated integers'}, status=400)
+                return
+        else:
+            ids = [idea_id]
+        try:
+            changed, delta = update_ideas_status(ids, form.get('status', ''))
+        except ValueError as e:
+            self.send_json({'error': str(e)}, status=400)
+            return
+        if changed:
+            render_cache.clear()
+        if idea_id is None:
+            self.send_json({'updated': changed, 'delta': delta})
+            return
+        ideas = get_ideas_by_ids(ids)
+        if not ideas:
+            self.send_json({'error': 'Idea not found'}, status=404)
+            return
+        self.send_json({'id': idea_id, 'status': ideas[0]['status'],
+                        'card': render_idea_card(ideas[0]), 'delta': delta})
+    
+    def parse_form(self):
+        """Read the request body as a form; on failure answer and return None"""
+        try:
+            return read_form(self.rfile, self.headers)
+        except FormError as e:
+            # Whatever is left of the body is still on the wire
+            self.close_connection = True
+            self.send_body(e.message.encode(), 'text/plain; charset=utf-8', status=e.status)
+            return None
     
+    @instrumented
     def do_POST(self):
         parsed = urlparse(self.path)
         
         # Handle login
         if parsed.path == '/login':
-            content_type = self.headers.get('Content-Type')
-            if content_type:
-                form = cgi.FieldStorage(
-                    fp=self.rfile,
-                    headers=self.headers,
-                    environ={
-                        'REQUEST_METHOD': 'POST',
-                        'CONTENT_TYPE': content_type,
-                    }
-                )
-                
-                password = form.getvalue('password', '')
-                
-                if password == PASSWORD:
-                    token = create_session()
-                    self.send_response(302)
-                    self.send_header('Location', '/')
-                    self.send_header('Set-Cookie', f'{SESSION_COOKIE_NAME}={token}; Path=/; HttpOnly; Max-Age={SESSION_TIMEOUT}')
-                    self.end_headers()
-                else:
-                    self.send_login_page(error=True)
+            form = self.parse_form()
+            if form is None:
+                return
+            
+            password = form.get('password', '')
+            
+            if hmac.compare_digest(password.encode(), PASSWORD.encode()):
+                token = create_session()
+                self.send_redirect('/', headers=[
+                    ('Set-Cookie', f'{SESSION_COOKIE_NAME}={token}; Path=/; HttpOnly; Max-Age={SESSION_TIMEOUT}'),
+                ])
+            else:
+                self.send_login_page(error=True)
             return
         
-        # Check auth for POST to /add
+        # Check auth for all other POSTs
         if not self.check_auth():
-            self.send_login_page()
+            self.close_connection = True
+            if parsed.path.startswith('/api/'):
+                self.send_json({'error': 'Authentication required'}, status=401,
+                               headers=[('WWW-Authenticate', 'Bearer')])
+            else:
+                self.send_login_page()
+            return
+        
+        match = IDEA_STATUS_PATH.fullmatch(parsed.path)
+        if match or parsed.path == '/api/ideas/status':
+            form = self.parse_form()
+            if form is None:
+                return
+            self.send_status_change(form, int(match.group(1)) if match else None)
             return
         
         if parsed.path == '/add':
             # Parse form data
-            content_type = self.headers.get('Content-Type')
-            if content_type:
-                form = cgi.FieldStorage(
-                    fp=self.rfile,
-                    headers=self.headers,
-                    environ={
-                        'REQUEST_METHOD': 'POST',
-                        'CONTENT_TYPE': content_type,
-                    }
-                )
-                
-                title = form.getvalue('title', '')
-                problem = form.getvalue('problem', '')
-                description = form.getvalue('description', '')
-                existing_solutions = form.getvalue('existing_solutions', '')
-                source = form.getvalue('source', '')
-                category = form.getvalue('category', '')
-                
-                if title and problem and source:
-                    add_idea(title, problem, description, existing_solutions, source, category)
+            form = self.parse_form()
+            if form is None:
+                return
+            
+            title = form.get('title', '')
+            problem = form.get('problem', '')
+            description = form.get('description', '')
+            existing_solutions = form.get('existing_solutions', '')
+            source = form.get('source', '')
+            category = form.get('category', '')
+            
+            if title and problem and source:
+                try:
+                    add_idea(title, problem, description, existing_solutions, source, category, on_duplicate='flag')
+                    render_cache.clear()
+                except ValueError:
+                    pass  # blank title or problem: nothing to store, like a missing field
             
             # Redirect to home
             self.send_redirect('/')
             return
         
+        self.close_connection = True
         self.send_redirect('/')
 
 if __name__ == "__main__":
-    import os
     port = int(os.environ.get("PORT", 5000))
     init_db()
-    print(f"Idea Tracker: http://0.0.0.0:{port}")
-    http.server.HTTPServer(("", port), Handler).serve_forever()
+    print(f"Idea Tracker: http://0.0.0.0:{port} ({SERVER_MODE})")
+    if profiler:
+        print(f"Profiling requests slower than {PROFILE_SLOW_MS:g}ms into {PROFILE_DIR}")
+    if BACKUP_INTERVAL > 0:
+        BackupScheduler().start()
+        print(f"Backing up every {BACKUP_INTERVAL:g}s into {BACKUP_DIR}")
+    create_server(port).serve_forever()
@@ -0,0 +1,142 @@
+"""
+Idea Tracker - Sessions
+Login sessions, either kept in a bounded in-memory store or as signed tokens
+"""
+
+import os
+import sys
+import hmac
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+SESSION_TIMEOUT = 60 * 60 * 24  # 24 hours
+# "memory" keeps sessions in this process; "signed" issues HMAC-signed
+# tokens that any process sharing SESSION_SECRET can check without state.
+SESSION_MODE = os.environ.get("SESSION_MODE", "memory")
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "")
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", 10000))
+SWEEP_BATCH = 64  # expired entries dropped per call at most
+
+class SessionStore:
+    """In-memory sessions ordered by last use, so expired ones sit in front
+
+    Every call drops a few expired entries from the front; each entry is
+    removed at most once, which keeps sweeping amortized O(1). Past
+    max_sessions the least recently used session is evicted.
+    """
+
+    def __init__(self, timeout=SESSION_TIMEOUT, max_sessions=MAX_SESSIONS):
+        self.timeout = timeout
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # token -> last seen
+        self._lock = threading.Lock()
+
+    def _sweep(self, now):
+        for _ in range(SWEEP_BATCH):
+            if not self._sessions:
+                return
+            token, seen = next(iter(self._sessions.items()))
+            if now - seen <= self.timeout:
+                return
+            del self._sessions[token]
+
+    def create(self):
+        token = secrets.token_hex(16)
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._sessions[token] = now
+        return token
+
+    def validate(self, token):
+        """Check the session and extend it on success"""
+        if not token:
+            return False
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            seen = self._sessions.get(token)
+            if seen is None:
+                return False
+            if now - seen > self.timeout:
+                del self._sessions[token]
+                return False
+            self._sessions[token] = now
+            self._sessions.move_to_end(token)
+            return True
+
+    def revoke(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+class SignedTokens:
+    """Stateless tokens: issue time and a nonce, signed with HMAC-SHA256
+
+    Nothing is stored, so memory stays flat and every process holding the
+    same secret accepts the token. The flip side: a token stays valid until
+    it expires even after logout, which only clears the cookie.
+    """
+
+    def __init__(self, secret, timeout=SESSION_TIMEOUT):
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.timeout = timeout
+
+    def _sign(self, payload):
+        digest = hmac.new(self.secret, payload.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+    def create(self):
+        payload = f"{int(time.time()):x}.{secrets.token_hex(8)}"
+        return f"{payload}.{self._sign(payload)}"
+
+    def validate(self, token):
+        if not token or token.count('.') != 2:
+            return False
+        payload, _, signature = token.rpartition('.')
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return False
+        try:
+            issued = int(payload.split('.', 1)[0], 16)
+        except ValueError:
+            return False
+        return 0 <= time.time() - issued <= self.timeout
+
+    def revoke(self, token):
+        pass
+
+    def __len__(self):
+        return 0
+
+def _create_store():
+    if SESSION_MODE == "signed":
+        secret = SESSION_SECRET
+        if not secret:
+            print("SESSION_SECRET is not set; signed sessions only work within this process", file=sys.stderr)
+            secret = secrets.token_hex(32)
+        return SignedTokens(secret)
+    return SessionStore()
+
+store = _create_store()
+
+def create_session():
+    """Create a new session token"""
+    return store.create()
+
+def validate_session(token):
+    """Check if session is valid and not expired"""
+    return store.validate(token)
+
+def revoke_session(token):
+    store.revoke(token)
+
+def session_count():
+    return len(store)